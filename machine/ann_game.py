@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Vizinhos aproximados (MOTOR_VIZINHOS=ivf)
+A similaridade exata monta a matriz n x n de cossenos: memória e tempo de
+treino quadráticos no tamanho do catálogo. O índice IVF (arquivo invertido)
+agrupa os vetores TF-IDF normalizados com k-means esférico em ~sqrt(n) listas;
+cada consulta compara o jogo só com os jogos das IVF_SONDAGENS listas de
+centróide mais parecido. Só NumPy.
+
+- treino: O(n * listas * d) por iteração, ~n^1.5 com listas = sqrt(n);
+- consulta: O(listas * d + candidatos * d), candidatos ~ n * sondagens / listas;
+- IVF_SONDAGENS maior = recall maior e consulta mais lenta.
+
+Relatório de recall@k contra a busca exata (com o catálogo de FONTE_DADOS):
+    python ann_game.py [k] [amostra]
+"""
+
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MOTOR_EXATO = 'exato'
+MOTOR_IVF = 'ivf'
+MOTORES_VIZINHOS = (MOTOR_EXATO, MOTOR_IVF)
+
+IVF_LISTAS = int(os.getenv('IVF_LISTAS', 0))  # 0 = automático (~sqrt(n))
+IVF_SONDAGENS = int(os.getenv('IVF_SONDAGENS', 8))
+IVF_ITERACOES = int(os.getenv('IVF_ITERACOES', 10))
+IVF_AMOSTRA_TREINO = int(os.getenv('IVF_AMOSTRA_TREINO', 50000))
+
+# Linhas por bloco nas multiplicações contra todos os centróides/vetores
+TAMANHO_BLOCO = 8192
+
+
+def _mais_proximos(dados: np.ndarray, centroides: np.ndarray) -> np.ndarray:
+    """Centróide de maior cosseno para cada linha (vetores já normalizados)"""
+    atribuicao = np.empty(len(dados), dtype=np.int64)
+    for inicio in range(0, len(dados), TAMANHO_BLOCO):
+        bloco = dados[inicio:inicio + TAMANHO_BLOCO]
+        atribuicao[inicio:inicio + len(bloco)] = np.argmax(bloco @ centroides.T, axis=1)
+    return atribuicao
+
+
+def _normalizar(vetores: np.ndarray) -> np.ndarray:
+    normas = np.linalg.norm(vetores, axis=1, keepdims=True)
+    return vetores / np.where(normas > 0, normas, 1)
+
+
+def _kmeans_esferico(dados: np.ndarray, listas: int, iteracoes: int,
+                     rng: np.random.Generator) -> np.ndarray:
+    """k-means com similaridade cosseno; centróides de norma 1"""
+    centroides = dados[rng.choice(len(dados), listas, replace=False)].copy()
+    for _ in range(iteracoes):
+        atribuicao = _mais_proximos(dados, centroides)
+        contagem = np.bincount(atribuicao, minlength=listas)
+        ordem = np.argsort(atribuicao, kind='stable')
+        inicios = np.searchsorted(atribuicao[ordem], np.arange(listas))
+        ocupadas = contagem > 0
+
+        somas = np.zeros_like(centroides)
+        somas[ocupadas] = np.add.reduceat(dados[ordem], inicios[ocupadas], axis=0)
+        # Lista vazia recomeça em um vetor sorteado
+        vazias = np.flatnonzero(~ocupadas)
+        somas[vazias] = dados[rng.choice(len(dados), len(vazias), replace=False)]
+        centroides = _normalizar(somas).astype(dados.dtype, copy=False)
+    return centroides
+
+
+class IndiceIVF:
+    """
+    Índice IVF sobre os vetores de conteúdo
+
+    Args:
+        vetores: Matriz (jogos x dimensões), linhas com norma L2 = 1 (ou zero)
+        listas: Quantidade de listas (0 = ~sqrt(n))
+        sondagens: Listas visitadas por consulta
+    """
+
+    def __init__(self, vetores: np.ndarray, listas: int = IVF_LISTAS,
+                 sondagens: int = IVF_SONDAGENS, iteracoes: int = IVF_ITERACOES,
+                 amostra_treino: int = IVF_AMOSTRA_TREINO, semente: int = 0):
+        vetores = np.asarray(vetores, dtype=np.float32)
+        n = len(vetores)
+        self.listas = max(1, min(listas or int(round(np.sqrt(n))), n))
+        self.sondagens = max(1, min(sondagens, self.listas))
+
+        rng = np.random.default_rng(semente)
+        treino = vetores
+        if n > amostra_treino:
+            treino = vetores[np.sort(rng.choice(n, amostra_treino, replace=False))]
+        self.centroides = _kmeans_esferico(treino, self.listas, iteracoes, rng) if n else \
+            np.zeros((1, vetores.shape[1]), dtype=np.float32)
+
+        # Posições do catálogo agrupadas por lista: lista l = ordem[limites[l]:limites[l + 1]]
+        atribuicao = _mais_proximos(vetores, self.centroides)
+        self.ordem = np.argsort(atribuicao, kind='stable')
+        self.limites = np.searchsorted(atribuicao[self.ordem], np.arange(self.listas + 1))
+        # Vetores guardados na ordem das listas: cada lista é um bloco contíguo,
+        # comparado com a consulta sem copiar linhas
+        self.vetores = vetores[self.ordem]
+        self._linha = np.empty(n, dtype=np.int64)
+        self._linha[self.ordem] = np.arange(n)
+
+    def __len__(self) -> int:
+        return len(self.vetores)
+
+    def vetor(self, posicao) -> np.ndarray:
+        """Vetor de conteúdo de uma (ou várias) posições do catálogo"""
+        return self.vetores[self._linha[posicao]]
+
+    def _buscar(self, consulta: np.ndarray, limite: int, mascara: Optional[np.ndarray],
+                sondagens: int, excluir: np.ndarray) -> Tuple[np.ndarray, int]:
+        """Vizinhos de um vetor de consulta e quantos candidatos foram comparados"""
+        consulta = np.asarray(consulta, dtype=np.float32)
+        linhas_excluidas = self._linha[excluir]
+        listas_ordenadas = np.argsort(-(self.centroides @ consulta), kind='stable')
+
+        partes_posicoes = []
+        partes_scores = []
+        visitadas = 0
+        while True:
+            for lista in listas_ordenadas[visitadas:sondagens]:
+                inicio, fim = self.limites[lista], self.limites[lista + 1]
+                posicoes_lista = self.ordem[inicio:fim]
+                if mascara is None:
+                    permitidos = np.ones(fim - inicio, dtype=bool)
+                else:
+                    permitidos = mascara[posicoes_lista]
+                permitidos[linhas_excluidas[(linhas_excluidas >= inicio) & (linhas_excluidas < fim)] - inicio] = False
+                if permitidos.all():
+                    partes_posicoes.append(posicoes_lista)
+                    partes_scores.append(self.vetores[inicio:fim] @ consulta)
+                elif permitidos.any():
+                    linhas = np.flatnonzero(permitidos)
+                    partes_posicoes.append(posicoes_lista[linhas])
+                    partes_scores.append(self.vetores[inicio + linhas] @ consulta)
+            visitadas = sondagens
+            comparados = sum(len(parte) for parte in partes_posicoes)
+            # Com filtros restritivos as listas visitadas podem não bastar: amplia até completar
+            if comparados >= limite or visitadas >= self.listas:
+                break
+            sondagens = min(self.listas, sondagens * 2)
+
+        k = min(limite, comparados)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), comparados
+        candidatos = np.concatenate(partes_posicoes)
+        scores = np.concatenate(partes_scores)
+        escolhidos = np.argpartition(-scores, k - 1)[:k]
+        escolhidos = escolhidos[np.argsort(-scores[escolhidos], kind='stable')]
+        return candidatos[escolhidos], comparados
+
+    def buscar(self, posicao: int, limite: int, mascara: Optional[np.ndarray] = None,
+               sondagens: Optional[int] = None) -> np.ndarray:
+        """
+        Posições dos `limite` jogos mais parecidos, em ordem decrescente
+
+        Args:
+            posicao: Jogo base (nunca aparece no resultado)
+            mascara: Jogos permitidos (True = permitido)
+            sondagens: Listas visitadas (padrão: a do índice)
+        """
+        return self.buscar_vetor(self.vetor(posicao), limite, mascara, [posicao], sondagens)
+
+    def buscar_vetor(self, consulta: np.ndarray, limite: int, mascara: Optional[np.ndarray] = None,
+                     excluir: Sequence[int] = (), sondagens: Optional[int] = None) -> np.ndarray:
+        """
+        Posições dos `limite` jogos de maior produto escalar com `consulta`
+        (ex.: soma ponderada dos vetores de vários jogos), em ordem decrescente
+
+        Args:
+            excluir: Posições que nunca aparecem no resultado
+        """
+        excluir = np.asarray(excluir, dtype=np.int64)
+        return self._buscar(consulta, limite, mascara, sondagens or self.sondagens, excluir)[0]
+
+    def buscar_exato(self, posicoes: np.ndarray, limite: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k exato por força bruta (referência do relatório de recall)
+
+        Returns:
+            (vizinhos, scores): matrizes (consultas x limite)
+        """
+        posicoes = np.asarray(posicoes, dtype=np.int64)
+        scores = self.vetor(posicoes) @ self.vetores.T
+        scores[np.arange(len(posicoes)), self._linha[posicoes]] = -np.inf
+        k = min(limite, len(self) - 1)
+        vizinhos = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        valores = np.take_along_axis(scores, vizinhos, axis=1)
+        ordem = np.argsort(-valores, axis=1, kind='stable')
+        vizinhos = np.take_along_axis(vizinhos, ordem, axis=1)
+        return self.ordem[vizinhos], np.take_along_axis(valores, ordem, axis=1)
+
+
+# ================================================================
+# RELATÓRIO DE RECALL
+# ================================================================
+
+def avaliar_recall(indice: IndiceIVF, k: int = 10, amostra: int = 200,
+                   sondagens: Sequence[int] = (1, 2, 4, 8, 16, 32),
+                   semente: int = 0) -> Dict[str, object]:
+    """
+    recall@k do índice contra a busca exata, para cada valor de sondagens
+
+    Muitos jogos têm exatamente as mesmas tags (cosseno empatado), então um
+    vizinho aproximado conta como acerto se o score dele alcança o k-ésimo
+    score exato, e não só se for o mesmo jogo escolhido no empate.
+    """
+    rng = np.random.default_rng(semente)
+    posicoes = rng.choice(len(indice), min(amostra, len(indice)), replace=False)
+
+    # Uma consulta por vez, como no caminho de recomendação
+    inicio = time.perf_counter()
+    scores_exatos = np.vstack([indice.buscar_exato([posicao], k)[1] for posicao in posicoes])
+    ms_exato = (time.perf_counter() - inicio) * 1000 / len(posicoes)
+    corte = scores_exatos[:, -1] - 1e-5
+
+    resultados: List[Dict[str, float]] = []
+    for valor in sondagens:
+        if valor > indice.listas:
+            break
+        acertos = 0
+        candidatos = 0
+        inicio = time.perf_counter()
+        for linha, posicao in enumerate(posicoes):
+            vizinhos, comparados = indice._buscar(indice.vetor(posicao), k, None, valor, posicao[None])
+            candidatos += comparados
+            acertos += int(np.sum(indice.vetor(vizinhos) @ indice.vetor(posicao) >= corte[linha]))
+        resultados.append({
+            'sondagens': valor,
+            'recall': acertos / (len(posicoes) * scores_exatos.shape[1]),
+            'ms_por_consulta': (time.perf_counter() - inicio) * 1000 / len(posicoes),
+            'candidatos_pct': 100 * candidatos / (len(posicoes) * len(indice)),
+        })
+
+    return {'k': k, 'consultas': len(posicoes), 'listas': indice.listas,
+            'ms_exato': ms_exato, 'resultados': resultados}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    os.environ['MOTOR_VIZINHOS'] = MOTOR_IVF
+    os.environ.setdefault('CATALOGO_COMPACTO', 'false')
+
+    from knn_game import SistemaRecomendacaoGames
+
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    amostra = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    sistema = SistemaRecomendacaoGames()
+    relatorio = avaliar_recall(sistema._indice_ann, k, amostra)
+    print(f"\nrecall@{relatorio['k']} ({relatorio['consultas']} consultas, "
+          f"{len(sistema._indice_ann)} jogos, {relatorio['listas']} listas)")
+    print(f"exato: {relatorio['ms_exato']:.3f} ms/consulta")
+    print(f"{'sondagens':>10} {'recall':>8} {'ms/consulta':>12} {'candidatos':>11}")
+    for linha in relatorio['resultados']:
+        print(f"{linha['sondagens']:>10} {linha['recall']:>8.3f} "
+              f"{linha['ms_por_consulta']:>12.3f} {linha['candidatos_pct']:>10.1f}%")
@@ -4,15 +4,30 @@ API de Recomendação de Games - Backend Flask
 Integrado com MySQL Azure e sistema de avaliações
 """
 
-from flask import Flask, request, jsonify
+import math
+import threading
+import time
+_INICIO_IMPORTACAO = time.perf_counter()
+
+from flask import Blueprint, Flask, current_app, request, jsonify
 from flask_cors import CORS
 import os
 import logging
 import json
+from datetime import date
 from dotenv import load_dotenv
-from google.cloud import pubsub_v1
-from knn_game import SistemaRecomendacaoGames
+from inicializacao import (
+    CarregadorSistema,
+    PerfilInicializacao,
+    AQUECIMENTO_IMEDIATO,
+    AQUECIMENTO_SEGUNDO_PLANO,
+)
+from controle_admissao import controlar_admissao, estatisticas_admissao
+from feed_alteracoes import criar_assinante
+from perfilamento import instalar_perfilamento, perfilamento_autorizado, ler_resumo_perfil
 from pubsub_publish import publish_evaluation  # <-- Importa a função do pubsub_send.py
+from serializacao import resposta_json, interpretar_campos
+from tendencias import TENDENCIAS_TOP, votos_do_evento
 
 # ------------------------
 # Load env (para GOOGLE key path caso exista)
@@ -31,29 +46,151 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ========================
-# FLASK + CORS
+# ROTAS (registradas em create_app)
 # ========================
-app = Flask(__name__)
-CORS(app)
+bp = Blueprint("games", __name__)
 
-# ========================
-# SISTEMA DE RECOMENDAÇÃO
-# ========================
-sistema = SistemaRecomendacaoGames()
+# Máximo de IDs aceitos nas rotas em lote
+LOTE_MAX_IDS = int(os.getenv("API_LOTE_MAX_IDS", 100))
 
-# ========================
-# PUBSUB CONFIG
-# ========================
-# Use o tópico completo no .env: projects/<proj>/topics/<topic>
-PUBSUB_TOPIC = os.getenv("GCP_PUBSUB_TOPIC_NAME")
-publisher = pubsub_v1.PublisherClient()
+# Máximo de jogos por sorteio da descoberta
+DESCOBERTA_MAX_QUANTIDADE = int(os.getenv("API_DESCOBERTA_MAX", 50))
+
+# ================================================================
+# AUXILIARES
+# ================================================================
+
+def _sistema():
+    """Retorna o SistemaRecomendacaoGames do app (criado na primeira vez, se preciso)"""
+    return current_app.extensions["carregador_sistema"].obter()
+
+
+def _versao_contadores():
+    """Versão dos contadores em memória (None enquanto o modelo não está pronto)"""
+    carregador = current_app.extensions["carregador_sistema"]
+    if not carregador.pronto:
+        return None
+    return carregador.obter().versao_contadores
+
+
+def _campos_requisitados():
+    """
+    Lê o parâmetro `campos` (projeção de campos) da query string
+
+    Returns:
+        (campos, erro): lista de campos ou None, e resposta de erro se inválido
+    """
+    campos = interpretar_campos(request.args.get('campos'))
+    if campos:
+        from knn_game import CAMPOS_JOGO
+        invalidos = [c for c in campos if c not in CAMPOS_JOGO]
+        if invalidos:
+            return None, (jsonify({
+                "error": f"Campos inválidos: {', '.join(invalidos)}",
+                "campos_disponiveis": list(CAMPOS_JOGO)
+            }), 400)
+    return campos, None
+
+
+def _filtros_recomendacao():
+    """
+    Lê os filtros de recomendação da query string:
+    preco_max, idade_max, tags, excluir_tags (listas separadas por vírgula),
+    lancamento_de, lancamento_ate (AAAA-MM-DD)
+
+    Returns:
+        (filtros, erro): dicionário com os filtros informados (ou None) e resposta de erro
+    """
+    filtros = {
+        "tags": interpretar_campos(request.args.get('tags')),
+        "excluir_tags": interpretar_campos(request.args.get('excluir_tags')),
+    }
+    # type=float/int devolveria None para valores inválidos e o filtro seria ignorado
+    valor = request.args.get('preco_max')
+    if valor is not None:
+        try:
+            filtros["preco_max"] = float(valor)
+        except ValueError:
+            filtros["preco_max"] = math.nan
+        if not math.isfinite(filtros["preco_max"]):
+            return None, (jsonify({"error": "preco_max deve ser um número"}), 400)
+    valor = request.args.get('idade_max')
+    if valor is not None:
+        try:
+            filtros["idade_max"] = int(valor)
+        except ValueError:
+            return None, (jsonify({"error": "idade_max deve ser um número inteiro"}), 400)
+    for chave in ("lancamento_de", "lancamento_ate"):
+        valor = request.args.get(chave)
+        if valor:
+            try:
+                filtros[chave] = date.fromisoformat(valor).isoformat()
+            except ValueError:
+                return None, (jsonify({"error": f"{chave} deve estar no formato AAAA-MM-DD"}), 400)
+
+    filtros = {chave: valor for chave, valor in filtros.items() if valor is not None}
+    return filtros or None, None
+
+
+def _ids_do_corpo(data):
+    """
+    Lê a lista `ids` do corpo JSON das rotas em lote (sem repetições, na ordem)
+
+    Returns:
+        (ids, erro): lista de IDs inteiros e resposta de erro se inválida
+    """
+    ids = data.get("ids") if isinstance(data, dict) else None
+    if not isinstance(ids, list) or not ids:
+        return None, (jsonify({"error": "ids deve ser uma lista não vazia"}), 400)
+    try:
+        ids = list(dict.fromkeys(int(i) for i in ids))
+    except (TypeError, ValueError):
+        return None, (jsonify({"error": "ids deve conter apenas números inteiros"}), 400)
+    if len(ids) > LOTE_MAX_IDS:
+        return None, (jsonify({"error": f"Máximo de {LOTE_MAX_IDS} ids por requisição"}), 400)
+    return ids, None
+
+
+def _sementes_do_corpo(data, chave_ids: str, chave_pesos: str, obrigatoria: bool):
+    """
+    Lê uma lista de ids e os pesos alinhados a ela (rota de recomendações múltiplas)
+
+    Returns:
+        (ids, pesos, erro): pesos é None quando não informados
+    """
+    ids = data.get(chave_ids) if isinstance(data, dict) else None
+    if ids is None and not obrigatoria:
+        ids = []
+    if not isinstance(ids, list) or (obrigatoria and not ids):
+        descricao = "uma lista não vazia" if obrigatoria else "uma lista"
+        return None, None, (jsonify({"error": f"{chave_ids} deve ser {descricao}"}), 400)
+    try:
+        ids = [int(i) for i in ids]
+    except (TypeError, ValueError):
+        return None, None, (jsonify({"error": f"{chave_ids} deve conter apenas números inteiros"}), 400)
+    if len(ids) > LOTE_MAX_IDS:
+        return None, None, (jsonify({"error": f"Máximo de {LOTE_MAX_IDS} {chave_ids} por requisição"}), 400)
+
+    pesos = data.get(chave_pesos)
+    if pesos is None:
+        return ids, None, None
+    if not isinstance(pesos, list) or len(pesos) != len(ids):
+        return None, None, (jsonify({"error": f"{chave_pesos} deve ter um peso para cada item de {chave_ids}"}), 400)
+    try:
+        pesos = [float(p) for p in pesos]
+    except (TypeError, ValueError):
+        return None, None, (jsonify({"error": f"{chave_pesos} deve conter apenas números"}), 400)
+    if not all(0 < p < float("inf") for p in pesos):
+        return None, None, (jsonify({"error": f"{chave_pesos} deve conter apenas números positivos"}), 400)
+    return ids, pesos, None
 
 # ================================================================
 # ROTAS
 # ================================================================
 
-@app.route('/')
+@bp.route('/')
 def home():
+    sistema = _sistema()
     return jsonify({
         "message": "🎮 API de Recomendação de Games - Online!",
         "version": "2.0",
@@ -62,38 +199,60 @@ def home():
     })
 
 # ------------------------------
-@app.route('/jogos', methods=['GET'])
+@bp.route('/jogos', methods=['GET'])
 def get_jogos():
+    sistema = _sistema()
     limite = request.args.get('limite', default=50, type=int)
     pagina = request.args.get('pagina', default=1, type=int)
+    apos = request.args.get('apos', type=int)
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
 
-    jogos = sistema.get_todos_jogos()
-    start = (pagina - 1) * limite
-    end = start + limite
+    # Formata apenas a página pedida em vez do catálogo inteiro
+    total = len(sistema.games_df)
+    start = max((pagina - 1) * limite, 0)
+    jogos = sistema.get_todos_jogos(limite, campos, inicio=start, apos=apos) if limite > 0 else []
 
-    return jsonify({
-        "jogos": jogos[start:end],
+    resposta = {
+        "jogos": jogos,
         "pagina": pagina,
         "limite": limite,
-        "total": len(jogos),
-        "paginas_total": (len(jogos) + limite - 1) // limite
-    })
+        "total": total,
+        "paginas_total": (total + limite - 1) // limite if limite > 0 else 0
+    }
+    if apos is not None:
+        # Paginação por chave: a próxima página começa após o último id devolvido
+        resposta.pop("pagina")
+        resposta["apos"] = apos
+        resposta["proximo_apos"] = (
+            jogos[-1]["id"] if jogos and len(jogos) == limite and "id" in jogos[-1] else None
+        )
+    return resposta_json(resposta)
 
 
 # ------------------------------
-@app.route('/jogos/<int:jogo_id>', methods=['GET'])
+@bp.route('/jogos/<int:jogo_id>', methods=['GET'])
 def get_jogo_id(jogo_id):
-    jogo = sistema.get_jogo_por_id(jogo_id)
+    sistema = _sistema()
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
+    jogo = sistema.get_jogo_por_id(jogo_id, campos)
     if jogo:
-        return jsonify(jogo)
+        return resposta_json(jogo)
     return jsonify({"error": "Jogo não encontrado"}), 404
 
 
 # ------------------------------
-@app.route('/jogos/busca/<string:nome>', methods=['GET'])
+@bp.route('/jogos/busca/<string:nome>', methods=['GET'])
 def get_jogo_nome(nome):
-    jogos = sistema.get_jogo_por_nome(nome)
-    return jsonify({
+    sistema = _sistema()
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
+    jogos = sistema.get_jogo_por_nome(nome, campos)
+    return resposta_json({
         "resultados": jogos,
         "total": len(jogos),
         "busca": nome
@@ -101,8 +260,9 @@ def get_jogo_nome(nome):
 
 
 # ------------------------------
-@app.route('/jogos/categorias', methods=['GET'])
+@bp.route('/jogos/categorias', methods=['GET'])
 def get_jogos_por_categorias():
+    sistema = _sistema()
     categoria1 = request.args.get('cat1', '')
     categoria2 = request.args.get('cat2', '')
     categoria3 = request.args.get('cat3', '')
@@ -114,9 +274,12 @@ def get_jogos_por_categorias():
         return jsonify({"error": "Pelo menos uma categoria é necessária"}), 400
 
     limite = request.args.get('limite', default=10, type=int)
-    jogos = sistema.get_jogos_por_categorias(categorias, limite)
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
+    jogos = sistema.get_jogos_por_categorias(categorias, limite, campos)
 
-    return jsonify({
+    return resposta_json({
         "categorias_buscadas": categorias,
         "jogos": jogos,
         "total": len(jogos),
@@ -125,29 +288,168 @@ def get_jogos_por_categorias():
 
 
 # ------------------------------
-@app.route('/jogos/aleatorio', methods=['GET'])
+@bp.route('/jogos/aleatorio', methods=['GET'])
 def get_jogo_aleatorio():
-    return jsonify(sistema.get_jogo_aleatorio())
+    sistema = _sistema()
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
+    return resposta_json(sistema.get_jogo_aleatorio(campos))
+
+
+# ------------------------------
+@bp.route('/jogos/descoberta', methods=['GET'])
+def get_jogos_descoberta():
+    from descoberta import PESOS_DESCOBERTA, PESO_POPULARIDADE
+
+    sistema = _sistema()
+    quantidade = request.args.get('quantidade', default=1, type=int)
+    peso = request.args.get('peso', default=PESO_POPULARIDADE)
+    categorias = interpretar_campos(request.args.get('categoria'))
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
+    if peso not in PESOS_DESCOBERTA:
+        return jsonify({
+            "error": f"peso inválido: {peso}",
+            "pesos_disponiveis": list(PESOS_DESCOBERTA)
+        }), 400
+    if not 1 <= quantidade <= DESCOBERTA_MAX_QUANTIDADE:
+        return jsonify({"error": f"quantidade deve estar entre 1 e {DESCOBERTA_MAX_QUANTIDADE}"}), 400
+
+    jogos = sistema.get_jogos_descoberta(quantidade, peso, categorias, campos)
+    return resposta_json({
+        "jogos": jogos,
+        "total": len(jogos),
+        "peso": peso,
+        "categorias": categorias or []
+    })
 
 
 # ------------------------------
-@app.route('/jogos/<int:jogo_id>/recomendacoes', methods=['GET'])
+@bp.route('/jogos/<int:jogo_id>/recomendacoes', methods=['GET'])
+@controlar_admissao('recomendacoes', versao=_versao_contadores)
 def get_recomendacoes(jogo_id):
+    sistema = _sistema()
     limite = request.args.get('limite', default=5, type=int)
-    rec = sistema.get_jogos_recomendados(jogo_id, limite)
-    return jsonify({
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
+    filtros, erro = _filtros_recomendacao()
+    if erro:
+        return erro
+    rec = sistema.get_jogos_recomendados(jogo_id, limite, campos, filtros)
+    resposta = {
         "jogo_base_id": jogo_id,
         "recomendacoes": rec,
         "total": len(rec)
+    }
+    if filtros:
+        resposta["filtros"] = filtros
+    return resposta_json(resposta)
+
+
+# ------------------------------
+@bp.route('/jogos/lote', methods=['POST'])
+def post_jogos_lote():
+    sistema = _sistema()
+    ids, erro = _ids_do_corpo(request.get_json(silent=True))
+    if erro:
+        return erro
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
+
+    resultado = sistema.get_jogos_por_ids(ids, campos)
+    jogos = [jogo for jogo in resultado if jogo is not None]
+    return resposta_json({
+        "jogos": jogos,
+        "total": len(jogos),
+        "nao_encontrados": [i for i, jogo in zip(ids, resultado) if jogo is None]
     })
 
 
 # ------------------------------
-@app.route('/ranking/populares', methods=['GET'])
+@bp.route('/recomendacoes/lote', methods=['POST'])
+@controlar_admissao('recomendacoes_lote', versao=_versao_contadores)
+def post_recomendacoes_lote():
+    sistema = _sistema()
+    data = request.get_json(silent=True)
+    ids, erro = _ids_do_corpo(data)
+    if erro:
+        return erro
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
+    filtros, erro = _filtros_recomendacao()
+    if erro:
+        return erro
+
+    try:
+        limite = int(data.get("limite", 5))
+    except (TypeError, ValueError):
+        return jsonify({"error": "limite deve ser um número inteiro"}), 400
+
+    por_jogo = sistema.get_jogos_recomendados_lote(ids, limite, campos, filtros)
+    return resposta_json({
+        "resultados": [
+            {"jogo_base_id": jogo_id, "recomendacoes": por_jogo[jogo_id], "total": len(por_jogo[jogo_id])}
+            for jogo_id in ids
+        ],
+        "total": len(ids),
+        "limite": limite
+    })
+
+
+# ------------------------------
+@bp.route('/recomendacoes/multiplas', methods=['POST'])
+@controlar_admissao('recomendacoes_multiplas', versao=_versao_contadores)
+def post_recomendacoes_multiplas():
+    sistema = _sistema()
+    data = request.get_json(silent=True)
+    ids, pesos, erro = _sementes_do_corpo(data, "ids", "pesos", obrigatoria=True)
+    if erro:
+        return erro
+    negativos, pesos_negativos, erro = _sementes_do_corpo(data, "negativos", "pesos_negativos", obrigatoria=False)
+    if erro:
+        return erro
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
+    filtros, erro = _filtros_recomendacao()
+    if erro:
+        return erro
+
+    try:
+        limite = int(data.get("limite", 5))
+    except (TypeError, ValueError):
+        return jsonify({"error": "limite deve ser um número inteiro"}), 400
+
+    rec = sistema.get_jogos_recomendados_multiplos(
+        ids, limite, campos, filtros, pesos, negativos, pesos_negativos
+    )
+    resposta = {
+        "jogos_base_ids": ids,
+        "negativos": negativos,
+        "recomendacoes": rec,
+        "total": len(rec)
+    }
+    if filtros:
+        resposta["filtros"] = filtros
+    return resposta_json(resposta)
+
+
+# ------------------------------
+@bp.route('/ranking/populares', methods=['GET'])
+@controlar_admissao('ranking_populares', versao=_versao_contadores)
 def get_ranking_populares():
+    sistema = _sistema()
     limite = request.args.get('limite', default=10, type=int)
-    ranking = sistema.get_ranking_populares(limite)
-    return jsonify({
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
+    ranking = sistema.get_ranking_populares(limite, campos)
+    return resposta_json({
         "ranking": "populares",
         "jogos": ranking,
         "total": len(ranking)
@@ -155,12 +457,17 @@ def get_ranking_populares():
 
 
 # ------------------------------
-@app.route('/ranking/melhores', methods=['GET'])
+@bp.route('/ranking/melhores', methods=['GET'])
+@controlar_admissao('ranking_melhores', versao=_versao_contadores)
 def get_ranking_melhores():
+    sistema = _sistema()
     limite = request.args.get('limite', default=10, type=int)
     min_avaliacoes = request.args.get('min_avaliacoes', default=5, type=int)
-    ranking = sistema.get_ranking_melhor_avaliados(limite, min_avaliacoes)
-    return jsonify({
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
+    ranking = sistema.get_ranking_melhor_avaliados(limite, min_avaliacoes, campos)
+    return resposta_json({
         "ranking": "melhores",
         "jogos": ranking,
         "total": len(ranking),
@@ -168,67 +475,99 @@ def get_ranking_melhores():
     })
 
 
+# ------------------------------
+@bp.route('/ranking/tendencias', methods=['GET'])
+@controlar_admissao('ranking_tendencias', versao=_versao_contadores)
+def get_ranking_tendencias():
+    sistema = _sistema()
+    limite = request.args.get('limite', default=10, type=int)
+    if limite < 1 or limite > TENDENCIAS_TOP:
+        return jsonify({"error": f"limite deve estar entre 1 e {TENDENCIAS_TOP}"}), 400
+    campos, erro = _campos_requisitados()
+    if erro:
+        return erro
+    ranking = sistema.get_ranking_tendencias(limite, campos)
+    return resposta_json({
+        "ranking": "tendencias",
+        "jogos": ranking,
+        "total": len(ranking),
+        "meia_vida_horas": sistema.tendencias.meia_vida_horas
+    })
+
+
 # ======================================================
 # ROTAS PARA AVALIAÇÃO ENVIANDO PARA PUBSUB
 # ======================================================
 
-@app.route('/avaliacao/positiva', methods=['POST'])
-def post_avaliacao_positiva():
-    data = request.get_json()
+def validar_avaliacao(data):
+    """
+    Valida o corpo das rotas de avaliação
 
+    Returns:
+        (user_id, game_id) ou None se jogo_id/user_id estiverem ausentes
+    """
     if not data or "jogo_id" not in data or "user_id" not in data:
-        return jsonify({"error": "jogo_id e user_id são obrigatórios"}), 400
+        return None
+    return data["user_id"], data["jogo_id"]
 
-    user_id = data["user_id"]
-    game_id = data["jogo_id"]
 
-    message_id = publish_evaluation(user_id, game_id, "positive")
-    if message_id:
-        return jsonify({
-            "message": "Avaliação POSITIVA enviada para processamento",
-            "status": "enviado_pubsub",
-            "message_id": message_id,
-            "dados": {
-                "user_id": int(user_id),
-                "game_id": int(game_id),
-                "evaluation": "positive"
-            }
-        })
-    else:
-        logger.exception("Falha ao publicar no Pub/Sub")
-        return jsonify({"error": "Falha ao enviar avaliação para o Pub/Sub"}), 500
+def corpo_avaliacao_enviada(evaluation, message_id, user_id, game_id):
+    """Monta a resposta de sucesso das rotas de avaliação"""
+    rotulo = "POSITIVA" if evaluation == "positive" else "NEGATIVA"
+    return {
+        "message": f"Avaliação {rotulo} enviada para processamento",
+        "status": "enviado_pubsub",
+        "message_id": message_id,
+        "dados": {
+            "user_id": int(user_id),
+            "game_id": int(game_id),
+            "evaluation": evaluation
+        }
+    }
 
 
-@app.route('/avaliacao/negativa', methods=['POST'])
-def post_avaliacao_negativa():
-    data = request.get_json()
+ERRO_AVALIACAO_INVALIDA = {"error": "jogo_id e user_id são obrigatórios"}
+ERRO_AVALIACAO_PUBSUB = {"error": "Falha ao enviar avaliação para o Pub/Sub"}
 
-    if not data or "jogo_id" not in data or "user_id" not in data:
-        return jsonify({"error": "jogo_id e user_id são obrigatórios"}), 400
 
-    user_id = data["user_id"]
-    game_id = data["jogo_id"]
+def _publicar_avaliacao(evaluation):
+    dados = validar_avaliacao(request.get_json())
+    if dados is None:
+        return jsonify(ERRO_AVALIACAO_INVALIDA), 400
 
-    message_id = publish_evaluation(user_id, game_id, "negative")
+    user_id, game_id = dados
+    message_id = publish_evaluation(user_id, game_id, evaluation)
     if message_id:
-        return jsonify({
-            "message": "Avaliação NEGATIVA enviada para processamento",
-            "status": "enviado_pubsub",
-            "message_id": message_id,
-            "dados": {
-                "user_id": int(user_id),
-                "game_id": int(game_id),
-                "evaluation": "negative"
-            }
-        })
+        return jsonify(corpo_avaliacao_enviada(evaluation, message_id, user_id, game_id))
     else:
         logger.exception("Falha ao publicar no Pub/Sub")
-        return jsonify({"error": "Falha ao enviar avaliação para o Pub/Sub"}), 500
+        return jsonify(ERRO_AVALIACAO_PUBSUB), 500
+
+
+@bp.route('/avaliacao/positiva', methods=['POST'])
+def post_avaliacao_positiva():
+    return _publicar_avaliacao("positive")
+
+
+@bp.route('/avaliacao/negativa', methods=['POST'])
+def post_avaliacao_negativa():
+    return _publicar_avaliacao("negative")
 
 
 # ======================================================
-@app.route('/health', methods=['GET'])
+@bp.route('/health', methods=['GET'])
 def health_check():
+    carregador = current_app.extensions["carregador_sistema"]
+    if not carregador.pronto:
+        # Não bloqueia o health check: dispara o aquecimento e informa o estado
+        carregador.iniciar_aquecimento()
+        return jsonify({
+            "status": "aquecendo",
+            "jogos_carregados": 0,
+            "modelo_treinado": False
+        }), 503
+
+    sistema = carregador.obter()
     return jsonify({
         "status": "healthy",
         "jogos_carregados": len(sistema.games_df),
@@ -236,8 +575,9 @@ def health_check():
     })
 
 
-@app.route('/status', methods=['GET'])
+@bp.route('/status', methods=['GET'])
 def get_status():
+    sistema = _sistema()
     total = len(sistema.games_df)
     total_avaliacoes = (
         sistema.games_df['positive'].fillna(0).sum()
@@ -247,14 +587,182 @@ def get_status():
     return jsonify({
         "status": "operational",
         "jogos": total,
-        "avaliacoes_totais": int(total_avaliacoes)
+        "avaliacoes_totais": int(total_avaliacoes),
+        "admissao": estatisticas_admissao()
     })
 
 
+@bp.route('/status/inicializacao', methods=['GET'])
+def get_status_inicializacao():
+    carregador = current_app.extensions["carregador_sistema"]
+    relatorio = current_app.extensions["perfil_inicializacao"].relatorio()
+    relatorio["modelo_pronto"] = carregador.pronto
+    if carregador.pronto:
+        relatorio["memoria_catalogo"] = carregador.obter().relatorio_memoria
+    if carregador.erro is not None:
+        relatorio["erro"] = str(carregador.erro)
+    return jsonify(relatorio)
+
+
+# ------------------------------
+@bp.route('/status/perfis/<string:perfil_id>', methods=['GET'])
+def get_status_perfil(perfil_id):
+    # Mesmo token que liga o cProfile; sem ele a rota não existe
+    token = request.headers.get("X-Perfil") or request.args.get("perfil")
+    if not perfilamento_autorizado(token):
+        return jsonify({"error": "Rota não encontrada"}), 404
+    resumo = ler_resumo_perfil(perfil_id)
+    if resumo is None:
+        return jsonify({"error": "Perfil não encontrado"}), 404
+    return current_app.response_class(resumo, mimetype="text/plain")
+
+
+# ================================================================
+# APPLICATION FACTORY
+# ================================================================
+
+def _criar_sistema():
+    # Importado aqui: pandas/scikit-learn só são carregados quando o modelo é criado
+    if os.getenv("MODO_CONSULTA", "memoria") == "pushdown":
+        from pushdown_mysql import SistemaRecomendacaoPushdown
+        return SistemaRecomendacaoPushdown()
+    from knn_game import SistemaRecomendacaoGames
+    return SistemaRecomendacaoGames()
+
+
+class _FeedDuranteAquecimento:
+    """
+    Aplica no modelo em memória os eventos publicados pelo pubsub_worker
+
+    Enquanto o modelo carrega, os eventos ficam guardados e são aplicados assim
+    que ele fica pronto: uma alteração gravada depois que _carregar_dados leu a
+    tabela não estaria nos contadores carregados. Por jogo, guarda-se só o
+    último contador (os eventos trazem valores absolutos) e a soma dos votos.
+    """
+
+    def __init__(self, carregador):
+        self.carregador = carregador
+        self._lock = threading.Lock()
+        self._contadores = {}  # game_id -> (positive, negative)
+        self._votos = {}       # game_id -> [votos, ts mais recente]
+        self.guardados = 0
+        carregador.ao_ficar_pronto(self.repor)
+
+    def aplicar(self, eventos):
+        # O lock vale também para a aplicação: um evento novo não pode ser
+        # aplicado antes dos guardados, que são mais antigos
+        with self._lock:
+            if not self.carregador.pronto:
+                for evento in eventos:
+                    self._contadores[evento["game_id"]] = (evento["positive"], evento["negative"])
+                    votos = self._votos.setdefault(evento["game_id"], [0, 0.0])
+                    votos[0] += votos_do_evento(evento)
+                    votos[1] = max(votos[1], evento.get("ts") or time.time())
+                self.guardados += len(eventos)
+                return
+            sistema = self.carregador.obter()
+            for evento in eventos:
+                sistema.aplicar_alteracao_contadores(evento["game_id"], evento["positive"], evento["negative"])
+                sistema.tendencias.registrar(evento["game_id"], votos_do_evento(evento), evento.get("ts"))
+
+    def repor(self, sistema):
+        """Aplica os eventos guardados durante o aquecimento (chamado quando o sistema fica pronto)"""
+        with self._lock:
+            if not self.guardados:
+                return
+            for game_id, (positive, negative) in self._contadores.items():
+                sistema.aplicar_alteracao_contadores(game_id, positive, negative)
+            # Votos de antes do início da carga já estão em game_ratings (tendências reconstruídas)
+            inicio = self.carregador.inicio_criacao or 0.0
+            for game_id, (votos, ts) in self._votos.items():
+                if ts >= inicio:
+                    sistema.tendencias.registrar(game_id, votos, ts)
+            logger.info(
+                f"📨 Feed: {self.guardados} eventos recebidos durante o aquecimento aplicados "
+                f"({len(self._contadores)} jogos)"
+            )
+            self._contadores.clear()
+            self._votos.clear()
+            self.guardados = 0
+
+
+def create_app(sistema=None, aquecimento=None, feed=None, iniciar=True):
+    """
+    Cria o app Flask da API
+
+    Args:
+        sistema: SistemaRecomendacaoGames já criado (ex.: testes). Se None, é
+            criado de forma preguiçosa na primeira requisição ou no aquecimento
+        aquecimento: 'segundo_plano', 'sob_demanda' ou 'imediato'
+            (padrão: variável API_AQUECIMENTO ou 'segundo_plano')
+        feed: backend do feed de alterações ('unix', 'pubsub' ou 'nenhum';
+            padrão: variável FEED_BACKEND)
+        iniciar: Se False, não assina o feed nem aquece o modelo; o ponto de
+            entrada do servidor chama iniciar_servicos(app) depois
+
+    Returns:
+        App Flask com as rotas registradas
+    """
+    perfil = PerfilInicializacao()
+
+    with perfil.medir("create_app"):
+        app = Flask(__name__)
+        CORS(app)
+        app.register_blueprint(bp)
+        instalar_perfilamento(app)
+
+    fabrica = (lambda: sistema) if sistema is not None else _criar_sistema
+    carregador = CarregadorSistema(fabrica, perfil)
+    app.extensions["carregador_sistema"] = carregador
+    app.extensions["perfil_inicializacao"] = perfil
+
+    if iniciar:
+        iniciar_servicos(app, aquecimento, feed)
+    return app
+
+
+def iniciar_servicos(app, aquecimento=None, feed=None):
+    """
+    Assina o feed de alterações e dispara o aquecimento do modelo
+    Chamado uma vez pelo ponto de entrada do servidor; chamadas seguintes são ignoradas.
+
+    Args:
+        app: App criado por create_app
+        aquecimento: ver create_app
+        feed: ver create_app
+    """
+    if app.extensions.get("servicos_iniciados"):
+        return
+    app.extensions["servicos_iniciados"] = True
+    carregador = app.extensions["carregador_sistema"]
+
+    assinante = criar_assinante(feed)
+    if assinante is not None:
+        try:
+            assinante.iniciar(_FeedDuranteAquecimento(carregador).aplicar)
+            app.extensions["feed_alteracoes"] = assinante
+        except Exception:
+            logger.exception("❌ Não foi possível assinar o feed de alterações")
+
+    aquecimento = aquecimento or os.getenv("API_AQUECIMENTO", AQUECIMENTO_SEGUNDO_PLANO)
+    if aquecimento == AQUECIMENTO_IMEDIATO:
+        carregador.obter()
+    elif aquecimento == AQUECIMENTO_SEGUNDO_PLANO:
+        carregador.iniciar_aquecimento()
+
+
+# Importar o módulo não aquece o modelo nem abre o socket do feed (testes,
+# ferramentas CLI, asgi_game): os serviços sobem pelo ponto de entrada
+_TEMPO_IMPORTACAO = time.perf_counter() - _INICIO_IMPORTACAO
+app = create_app(iniciar=False)
+app.extensions["perfil_inicializacao"].registrar("importar_api_game", _TEMPO_IMPORTACAO)
+
+
 # ======================================================
 if __name__ == '__main__':
     host = os.getenv("FLASK_HOST", "0.0.0.0")
     port = int(os.getenv("FLASK_PORT", 4000))
     debug = os.getenv("FLASK_DEBUG", "False").lower() == "true"
 
+    iniciar_servicos(app)
     app.run(host=host, port=port, debug=debug)
\ No newline at end of file
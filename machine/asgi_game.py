@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+API de Recomendação de Games - Modo ASGI
+Expõe as mesmas rotas do api_game.py em um servidor assíncrono (ex.: uvicorn).
+
+- Rotas de avaliação: a publicação no Pub/Sub é aguardada no event loop,
+  sem ocupar uma thread enquanto espera a rede.
+- Demais rotas (recomendação, rankings, listas grandes): executadas pelo app
+  Flask em um pool de threads limitado, com fila máxima. Quando a fila enche,
+  a requisição é recusada com 503 + Retry-After (backpressure).
+- Acesso ao MySQL (consultas do modo pushdown, carga sob demanda do modelo): não é
+  aguardado no event loop. O driver (mysql-connector) é síncrono e as
+  consultas ficam dentro das views do Flask, então rodam no mesmo pool de
+  threads. Como cada thread atende uma requisição e usa no máximo uma conexão
+  por vez, ASGI_MAX_WORKERS também limita as consultas simultâneas ao banco
+  por processo (mantenha PUSHDOWN_POOL >= ASGI_MAX_WORKERS para não abrir
+  conexões fora do pool), e a fila do pool segura o excesso antes do MySQL.
+
+Execução:
+    uvicorn asgi_game:app --host 0.0.0.0 --port 4000
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from api_game import (
+    app as flask_app,
+    validar_avaliacao,
+    corpo_avaliacao_enviada,
+    ERRO_AVALIACAO_INVALIDA,
+    ERRO_AVALIACAO_PUBSUB,
+    iniciar_servicos,
+)
+from pubsub_publish import iniciar_publisher, publish_evaluation_future, publisher_pronto
+
+logger = logging.getLogger(__name__)
+
+# ========================
+# CONFIGURAÇÃO DO POOL
+# ========================
+ASGI_MAX_WORKERS = int(os.getenv("ASGI_MAX_WORKERS", min(32, (os.cpu_count() or 1) * 4)))
+ASGI_MAX_FILA = int(os.getenv("ASGI_MAX_FILA", 64))
+ASGI_RETRY_AFTER = int(os.getenv("ASGI_RETRY_AFTER", 1))
+ASGI_TIMEOUT_PUBSUB = float(os.getenv("ASGI_TIMEOUT_PUBSUB", 10))
+
+ROTAS_AVALIACAO = {
+    "/avaliacao/positiva": "positive",
+    "/avaliacao/negativa": "negative",
+}
+
+
+class SobrecargaError(Exception):
+    """O pool de CPU e sua fila estão cheios"""
+
+
+class PoolLimitado:
+    """
+    Pool de threads com limite de trabalhos pendentes (em execução + na fila).
+    O contador só é alterado no event loop, então não precisa de lock.
+    """
+
+    def __init__(self, max_workers: int, max_fila: int):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="asgi-cpu")
+        self.max_pendentes = max_workers + max_fila
+        self.pendentes = 0
+
+    async def executar(self, funcao, *args):
+        if self.pendentes >= self.max_pendentes:
+            raise SobrecargaError()
+        self.pendentes += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, funcao, *args)
+        finally:
+            self.pendentes -= 1
+
+    def encerrar(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ================================================================
+# PONTE ASGI -> WSGI (Flask)
+# ================================================================
+
+def _montar_environ(scope, corpo: bytes) -> dict:
+    """Converte o scope ASGI em um environ WSGI"""
+    servidor = scope.get("server") or ("localhost", 80)
+    cliente = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": servidor[0],
+        "SERVER_PORT": str(servidor[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": cliente[0],
+        "CONTENT_LENGTH": str(len(corpo)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(corpo),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for nome, valor in scope.get("headers", []):
+        nome = nome.decode("latin-1")
+        valor = valor.decode("latin-1")
+        if nome == "content-type":
+            environ["CONTENT_TYPE"] = valor
+            continue
+        if nome == "content-length":
+            continue
+        chave = "HTTP_" + nome.upper().replace("-", "_")
+        environ[chave] = f"{environ[chave]},{valor}" if chave in environ else valor
+    return environ
+
+
+def _chamar_wsgi(environ: dict):
+    """Executa o app Flask (roda dentro do pool de threads)"""
+    resposta = {}
+    partes = []
+
+    def start_response(status, headers, exc_info=None):
+        resposta["status"] = int(status.split(" ", 1)[0])
+        resposta["headers"] = [
+            (nome.lower().encode("latin-1"), valor.encode("latin-1")) for nome, valor in headers
+        ]
+        return partes.append
+
+    resultado = flask_app(environ, start_response)
+    try:
+        partes.extend(resultado)
+    finally:
+        if hasattr(resultado, "close"):
+            resultado.close()
+    return resposta["status"], resposta["headers"], b"".join(partes)
+
+
+# ================================================================
+# APP ASGI
+# ================================================================
+
+async def _ler_corpo(receive) -> bytes:
+    partes = []
+    while True:
+        mensagem = await receive()
+        if mensagem["type"] == "http.disconnect":
+            break
+        partes.append(mensagem.get("body", b""))
+        if not mensagem.get("more_body", False):
+            break
+    return b"".join(partes)
+
+
+async def _enviar(send, status: int, corpo: bytes, headers=None):
+    await send({"type": "http.response.start", "status": status, "headers": headers or []})
+    await send({"type": "http.response.body", "body": corpo})
+
+
+async def _enviar_json(send, scope, status: int, dados: dict, headers=None):
+    corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+    headers = [(b"content-type", b"application/json")] + (headers or [])
+    # Mesmo comportamento do flask-cors (origins="*") para as rotas nativas
+    if any(nome == b"origin" for nome, _ in scope.get("headers", [])):
+        headers.append((b"access-control-allow-origin", b"*"))
+    await _enviar(send, status, corpo, headers)
+
+
+async def _avaliacao(scope, receive, send, evaluation: str):
+    """POST /avaliacao/* tratado no event loop; a publicação é aguardada sem bloquear"""
+    corpo = await _ler_corpo(receive)
+    try:
+        data = json.loads(corpo) if corpo else None
+    except ValueError:
+        data = None
+
+    dados = validar_avaliacao(data) if isinstance(data, dict) else None
+    if dados is None:
+        await _enviar_json(send, scope, 400, ERRO_AVALIACAO_INVALIDA)
+        return
+
+    user_id, game_id = dados
+    try:
+        if publisher_pronto():
+            future = publish_evaluation_future(user_id, game_id, evaluation)
+        else:
+            # Criar o cliente (credenciais, canal gRPC) bloqueia: fica fora do event loop
+            future = await asyncio.get_running_loop().run_in_executor(
+                None, publish_evaluation_future, user_id, game_id, evaluation
+            )
+        message_id = await asyncio.wait_for(asyncio.wrap_future(future), ASGI_TIMEOUT_PUBSUB)
+        resposta = corpo_avaliacao_enviada(evaluation, message_id, user_id, game_id)
+    except Exception:
+        logger.exception("Falha ao publicar no Pub/Sub")
+        await _enviar_json(send, scope, 500, ERRO_AVALIACAO_PUBSUB)
+        return
+
+    await _enviar_json(send, scope, 200, resposta)
+
+
+class AppASGI:
+    """Aplicação ASGI que delega ao Flask/SistemaRecomendacaoGames"""
+
+    def __init__(self, max_workers: int = ASGI_MAX_WORKERS, max_fila: int = ASGI_MAX_FILA):
+        self.max_workers = max_workers
+        self.max_fila = max_fila
+        self.pool = None
+
+    def _obter_pool(self) -> PoolLimitado:
+        if self.pool is None:
+            self.pool = PoolLimitado(self.max_workers, self.max_fila)
+        return self.pool
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        evaluation = ROTAS_AVALIACAO.get(scope["path"])
+        if evaluation and scope["method"] == "POST":
+            await _avaliacao(scope, receive, send, evaluation)
+            return
+
+        corpo = await _ler_corpo(receive)
+        try:
+            status, headers, resposta = await self._obter_pool().executar(
+                _chamar_wsgi, _montar_environ(scope, corpo)
+            )
+        except SobrecargaError:
+            logger.warning("⚠️ Pool de CPU cheio, recusando %s %s", scope["method"], scope["path"])
+            await _enviar_json(
+                send, scope, 503,
+                {"error": "Servidor sobrecarregado, tente novamente"},
+                [(b"retry-after", str(ASGI_RETRY_AFTER).encode())]
+            )
+            return
+
+        await _enviar(send, status, resposta, headers)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            mensagem = await receive()
+            if mensagem["type"] == "lifespan.startup":
+                self._obter_pool()
+                # Feed e aquecimento do app Flask (o modo 'imediato' bloqueia: fica em uma thread)
+                await asyncio.get_running_loop().run_in_executor(None, iniciar_servicos, flask_app)
+                # Cliente Pub/Sub criado em segundo plano, sem atrasar o startup nem o event loop
+                asyncio.get_running_loop().run_in_executor(None, iniciar_publisher)
+                logger.info(f"🚀 ASGI pronto: {self.max_workers} threads de CPU, fila máxima {self.max_fila}")
+                await send({"type": "lifespan.startup.complete"})
+            elif mensagem["type"] == "lifespan.shutdown":
+                if self.pool is not None:
+                    self.pool.encerrar()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = AppASGI()
+
+
+# ======================================================
+if __name__ == '__main__':
+    import uvicorn
+
+    host = os.getenv("FLASK_HOST", "0.0.0.0")
+    port = int(os.getenv("FLASK_PORT", 4000))
+    uvicorn.run(app, host=host, port=port)
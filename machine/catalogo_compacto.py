@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Catálogo compacto de jogos
+Reduz a memória residente do games_df em cada worker da API:
+
+- colunas numéricas em int32/float32;
+- strings repetidas (genres, categories, release_date) codificadas como
+  categorias (dicionário + códigos);
+- nomes internados;
+- campos pesados e pouco lidos (description, header_image) movidos para um
+  armazém em disco mapeado em memória, lido só quando o jogo completo é pedido.
+"""
+
+import atexit
+import logging
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CAMPOS_FRIOS = ('description', 'header_image')
+
+# Colunas numéricas e o tipo compacto de cada uma
+TIPOS_NUMERICOS = {
+    'id': np.int32,
+    'required_age': np.int16,
+    'positive': np.int32,
+    'negative': np.int32,
+    'recommendations': np.int32,
+    'total_avaliacoes': np.int32,
+    'price': np.float32,
+    'nota_media': np.float32,
+}
+
+COLUNAS_CATEGORICAS = ('genres', 'categories', 'release_date')
+
+# Diretórios de armazéns ainda não descartados, removidos na saída do processo
+# (um único handler de atexit, não um por recarga do modelo)
+_diretorios_abertos = set()
+
+
+def _remover_diretorios_abertos():
+    for diretorio in list(_diretorios_abertos):
+        shutil.rmtree(diretorio, ignore_errors=True)
+    _diretorios_abertos.clear()
+
+
+atexit.register(_remover_diretorios_abertos)
+
+
+class ArmazemFrio:
+    """
+    Campos de texto guardados fora do DataFrame, um arquivo por campo:
+    <campo>.bin com os textos UTF-8 concatenados e <campo>.idx com os offsets.
+    Os arquivos são mapeados em memória; o sistema operacional só carrega as
+    páginas efetivamente lidas.
+    """
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        self._dados: Dict[str, mmap.mmap] = {}
+        self._offsets: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def criar(cls, df: pd.DataFrame, campos: Iterable[str],
+              diretorio_base: Optional[str] = None) -> 'ArmazemFrio':
+        """Grava os campos do DataFrame em disco e abre o armazém"""
+        diretorio = tempfile.mkdtemp(prefix='catalogo_frio_', dir=diretorio_base)
+        armazem = cls(diretorio)
+        _diretorios_abertos.add(diretorio)
+        for campo in campos:
+            armazem._gravar(campo, df[campo])
+        return armazem
+
+    def _gravar(self, campo: str, valores: pd.Series):
+        caminho_dados = os.path.join(self.diretorio, f'{campo}.bin')
+        # offset -1 no início marca valor nulo
+        inicios = np.empty(len(valores), dtype=np.int64)
+        fins = np.empty(len(valores), dtype=np.int64)
+        posicao = 0
+        with open(caminho_dados, 'wb') as arquivo:
+            for i, valor in enumerate(valores):
+                if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+                    inicios[i] = -1
+                    fins[i] = posicao
+                    continue
+                codificado = str(valor).encode('utf-8')
+                arquivo.write(codificado)
+                inicios[i] = posicao
+                posicao += len(codificado)
+                fins[i] = posicao
+        np.save(os.path.join(self.diretorio, f'{campo}.idx.npy'), np.stack([inicios, fins]))
+
+        self._offsets[campo] = np.load(os.path.join(self.diretorio, f'{campo}.idx.npy'), mmap_mode='r')
+        with open(caminho_dados, 'rb') as arquivo:
+            # mmap não aceita arquivo vazio
+            self._dados[campo] = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ) if posicao else None
+
+    def ler(self, campo: str, posicao: int) -> Optional[str]:
+        """Lê o valor de um campo para a linha `posicao` do catálogo"""
+        inicio = int(self._offsets[campo][0, posicao])
+        if inicio < 0:
+            return None
+        fim = int(self._offsets[campo][1, posicao])
+        if fim == inicio:
+            return ''
+        return self._dados[campo][inicio:fim].decode('utf-8')
+
+    def tamanho_em_disco(self) -> int:
+        return sum(
+            os.path.getsize(os.path.join(self.diretorio, nome))
+            for nome in os.listdir(self.diretorio)
+        ) if os.path.isdir(self.diretorio) else 0
+
+    def descartar(self):
+        """Fecha os mapeamentos e remove os arquivos; o armazém não pode mais ser lido"""
+        dados, self._dados = self._dados, {}
+        for mapeamento in dados.values():
+            if mapeamento is not None:
+                mapeamento.close()
+        # np.memmap não tem close: o mapeamento é liberado com a última referência
+        self._offsets = {}
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+        _diretorios_abertos.discard(self.diretorio)
+
+
+def memoria_df(df: pd.DataFrame) -> int:
+    """Memória ocupada pelo DataFrame em bytes, incluindo o conteúdo das strings"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def compactar_catalogo(df: pd.DataFrame, diretorio_frio: Optional[str] = None):
+    """
+    Converte o games_df para o layout compacto
+
+    Args:
+        df: DataFrame do catálogo (índice = posição da linha)
+        diretorio_frio: Onde criar o armazém frio (padrão: diretório temporário)
+
+    Returns:
+        (df_compacto, armazem_frio, relatorio_memoria)
+    """
+    antes = memoria_df(df)
+
+    campos_frios = [campo for campo in CAMPOS_FRIOS if campo in df.columns]
+    armazem = ArmazemFrio.criar(df, campos_frios, diretorio_frio)
+    compacto = df.drop(columns=campos_frios)
+
+    for coluna, tipo in TIPOS_NUMERICOS.items():
+        if coluna in compacto.columns:
+            valores = pd.to_numeric(compacto[coluna], errors='coerce').fillna(0)
+            compacto[coluna] = valores.astype(tipo)
+
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in compacto.columns:
+            compacto[coluna] = compacto[coluna].astype('category')
+
+    if 'name' in compacto.columns:
+        compacto['name'] = compacto['name'].map(
+            lambda nome: sys.intern(nome) if isinstance(nome, str) else nome
+        )
+
+    depois = memoria_df(compacto)
+    relatorio = {
+        'memoria_antes_bytes': antes,
+        'memoria_depois_bytes': depois,
+        'armazem_frio_disco_bytes': armazem.tamanho_em_disco(),
+        'reducao_percentual': round(100 * (1 - depois / antes), 1) if antes else 0.0,
+    }
+    logger.info(
+        f"💾 Catálogo compacto: {antes / 1e6:.2f} MB → {depois / 1e6:.2f} MB em memória "
+        f"(+ {relatorio['armazem_frio_disco_bytes'] / 1e6:.2f} MB mapeados do disco)"
+    )
+    return compacto, armazem, relatorio
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Coalescência de requisições e controle de admissão das rotas caras
+
+- Voo único: requisições idênticas simultâneas (mesma rota, query string,
+  Accept-Encoding e, nos POST, mesmo corpo) esperam o cálculo da primeira em vez de repeti-lo. Quem
+  espera ocupa um lugar na fila da rota, como quem espera por uma vaga.
+- Cache curto: a resposta (corpo, status, headers) fica guardada por
+  COALESCENCIA_TTL segundos. Guarda-se o conteúdo, nunca o objeto Response,
+  que é de uma requisição só.
+- Limite por rota: no máximo ADMISSAO_MAX_SIMULTANEAS cálculos ao mesmo tempo;
+  até ADMISSAO_MAX_FILA esperam ADMISSAO_ESPERA_MAX segundos por uma vaga, o
+  resto recebe 503 + Retry-After. Assim uma rota sob avalanche não ocupa todas
+  as threads e rotas como /jogos/<id> continuam respondendo.
+"""
+
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+COALESCENCIA_TTL = float(os.getenv("COALESCENCIA_TTL", 2.0))
+COALESCENCIA_MAX_ITENS = int(os.getenv("COALESCENCIA_MAX_ITENS", 512))
+ADMISSAO_MAX_SIMULTANEAS = int(os.getenv("ADMISSAO_MAX_SIMULTANEAS", 4))
+ADMISSAO_MAX_FILA = int(os.getenv("ADMISSAO_MAX_FILA", 32))
+ADMISSAO_ESPERA_MAX = float(os.getenv("ADMISSAO_ESPERA_MAX", 2.0))
+ADMISSAO_RETRY_AFTER = int(os.getenv("ADMISSAO_RETRY_AFTER", 1))
+
+# (corpo, status, headers) de uma resposta já calculada
+RespostaGravada = Tuple[bytes, int, List[Tuple[str, str]]]
+
+# Headers que pertencem à requisição que calculou, não à resposta compartilhada
+HEADERS_NAO_COMPARTILHADOS = {"set-cookie", "server-timing", "x-perfil-id"}
+
+
+class SobrecargaError(Exception):
+    """Sem vaga para calcular a resposta (limite e fila cheios ou espera esgotada)"""
+
+
+class LimiteConcorrencia:
+    """Semáforo com fila limitada e espera máxima"""
+
+    def __init__(self, max_simultaneas: int, max_fila: int, espera_max: float):
+        self.max_simultaneas = max_simultaneas
+        self.max_fila = max_fila
+        self.espera_max = espera_max
+        self._semaforo = threading.BoundedSemaphore(max_simultaneas)
+        self._lock = threading.Lock()
+        self.aguardando = 0
+        self.recusadas = 0
+
+    def entrar_fila(self):
+        """Reserva um lugar na fila de espera ou levanta SobrecargaError se estiver cheia"""
+        with self._lock:
+            if self.aguardando >= self.max_fila:
+                self.recusadas += 1
+                raise SobrecargaError()
+            self.aguardando += 1
+
+    def sair_fila(self):
+        with self._lock:
+            self.aguardando -= 1
+
+    def adquirir(self):
+        self.entrar_fila()
+        try:
+            conseguiu = self._semaforo.acquire(timeout=self.espera_max)
+        finally:
+            self.sair_fila()
+        if not conseguiu:
+            with self._lock:
+                self.recusadas += 1
+            raise SobrecargaError()
+
+    def liberar(self):
+        self._semaforo.release()
+
+
+class _Voo:
+    """Cálculo em andamento, aguardado pelas requisições idênticas"""
+
+    __slots__ = ("evento", "resposta", "erro")
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resposta = None
+        self.erro = None
+
+
+class CoalescedorRequisicoes:
+    """Voo único + cache curto + limite de concorrência de uma rota"""
+
+    def __init__(self, nome: str, ttl: float = COALESCENCIA_TTL,
+                 max_itens: int = COALESCENCIA_MAX_ITENS,
+                 limite: Optional[LimiteConcorrencia] = None):
+        self.nome = nome
+        self.ttl = ttl
+        self.max_itens = max_itens
+        self.limite = limite or LimiteConcorrencia(
+            ADMISSAO_MAX_SIMULTANEAS, ADMISSAO_MAX_FILA, ADMISSAO_ESPERA_MAX
+        )
+        self._cache: "OrderedDict[tuple, Tuple[float, RespostaGravada]]" = OrderedDict()
+        self._em_voo: Dict[tuple, _Voo] = {}
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.calculadas = 0
+        self.coalescidas = 0
+
+    def executar(self, chave: tuple, calcular: Callable[[], RespostaGravada]) -> Tuple[RespostaGravada, str]:
+        """
+        Devolve a resposta para a chave e a origem: 'cache', 'coalescida' ou 'calculada'
+        Levanta SobrecargaError se não houver vaga para calcular.
+        """
+        with self._lock:
+            item = self._cache.get(chave)
+            if item is not None and item[0] > time.monotonic():
+                self._cache.move_to_end(chave)
+                self.cache_hits += 1
+                return item[1], "cache"
+            voo = self._em_voo.get(chave)
+            lider = voo is None
+            if lider:
+                voo = self._em_voo[chave] = _Voo()
+
+        if not lider:
+            # Sem prazo próprio: a espera do líder por uma vaga já é limitada
+            # (espera_max) e, depois que ele começa a calcular, desistir só
+            # faria o cliente repetir o mesmo cálculo
+            self.limite.entrar_fila()
+            try:
+                voo.evento.wait()
+            finally:
+                self.limite.sair_fila()
+            if voo.erro is not None:
+                raise voo.erro
+            with self._lock:
+                self.coalescidas += 1
+            return voo.resposta, "coalescida"
+
+        try:
+            self.limite.adquirir()
+            try:
+                resposta = calcular()
+            finally:
+                self.limite.liberar()
+            voo.resposta = resposta
+            with self._lock:
+                self.calculadas += 1
+                if resposta[1] == 200 and self.ttl > 0:
+                    self._cache[chave] = (time.monotonic() + self.ttl, resposta)
+                    self._cache.move_to_end(chave)
+                    while len(self._cache) > self.max_itens:
+                        self._cache.popitem(last=False)
+            return resposta, "calculada"
+        except BaseException as e:
+            # Quem esperava por este cálculo recebe o mesmo erro (inclusive a sobrecarga)
+            voo.erro = e
+            raise
+        finally:
+            with self._lock:
+                self._em_voo.pop(chave, None)
+            voo.evento.set()
+
+    def estatisticas(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "calculadas": self.calculadas,
+                "coalescidas": self.coalescidas,
+                "cache_hits": self.cache_hits,
+                "cache_itens": len(self._cache),
+                "em_voo": len(self._em_voo),
+                "aguardando_vaga": self.limite.aguardando,
+                "recusadas": self.limite.recusadas,
+            }
+
+
+_coalescedores: Dict[str, CoalescedorRequisicoes] = {}
+
+
+def estatisticas_admissao() -> Dict[str, Dict[str, object]]:
+    """Contadores de cada rota controlada (exibidos em /status)"""
+    return {nome: coalescedor.estatisticas() for nome, coalescedor in _coalescedores.items()}
+
+
+# ================================================================
+# INTEGRAÇÃO COM O FLASK
+# ================================================================
+
+def _chave_requisicao(request) -> tuple:
+    chave = (
+        request.method,
+        request.path,
+        tuple(sorted(request.args.items(multi=True))),
+        request.headers.get("Accept-Encoding", ""),
+    )
+    if request.method == "POST":
+        # Resumo do corpo (o corpo fica em cache no request e a view ainda consegue lê-lo)
+        corpo = hashlib.blake2b(request.get_data(cache=True), digest_size=16).digest()
+        chave += (request.mimetype, corpo)
+    return chave
+
+
+def controlar_admissao(nome: str, ttl: float = COALESCENCIA_TTL,
+                       versao: Optional[Callable[[], object]] = None):
+    """
+    Decorator das views caras: coalescência, cache curto e limite de concorrência
+
+    Args:
+        nome: Nome da rota nas estatísticas (um limite por nome)
+        ttl: Segundos que a resposta fica em cache (0 = só coalescência)
+        versao: Versão dos dados usados pela rota, incluída na chave; quando
+            muda, as respostas guardadas deixam de ser usadas
+    """
+    coalescedor = _coalescedores.setdefault(nome, CoalescedorRequisicoes(nome, ttl))
+
+    def decorador(view):
+        @functools.wraps(view)
+        def envolvida(*args, **kwargs):
+            from flask import current_app, jsonify, request
+            from perfilamento import perfilamento_autorizado
+
+            # Requisição perfilada precisa executar de verdade (só com token válido,
+            # senão `?perfil=x` bastaria para escapar do limite)
+            if perfilamento_autorizado(request.headers.get("X-Perfil") or request.args.get("perfil")):
+                return view(*args, **kwargs)
+
+            def calcular() -> RespostaGravada:
+                resposta = current_app.make_response(view(*args, **kwargs))
+                headers = [
+                    (nome_header, valor) for nome_header, valor in resposta.headers.items()
+                    if nome_header.lower() not in HEADERS_NAO_COMPARTILHADOS
+                ]
+                return resposta.get_data(), resposta.status_code, headers
+
+            try:
+                chave = _chave_requisicao(request)
+                if versao is not None:
+                    chave += (versao(),)
+                (corpo, status, headers), origem = coalescedor.executar(chave, calcular)
+            except SobrecargaError:
+                return jsonify({"error": "Servidor sobrecarregado, tente novamente"}), 503, {
+                    "Retry-After": str(ADMISSAO_RETRY_AFTER)
+                }
+
+            resposta = current_app.response_class(corpo, status=status, headers=headers)
+            resposta.headers["X-Coalescencia"] = origem
+            return resposta
+
+        return envolvida
+
+    return decorador
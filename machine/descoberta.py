@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Descoberta de jogos ("me surpreenda")
+Sorteio ponderado por popularidade ou avaliação usando o método alias de
+Vose: a tabela é montada uma vez em O(n) e cada sorteio custa O(1)
+(um inteiro e um real aleatórios).
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+PESO_POPULARIDADE = 'popularidade'
+PESO_AVALIACAO = 'avaliacao'
+PESO_UNIFORME = 'uniforme'
+PESOS_DESCOBERTA = (PESO_POPULARIDADE, PESO_AVALIACAO, PESO_UNIFORME)
+
+# Avaliações a partir das quais a nota passa a valer "por inteiro" no peso por avaliação
+CONFIANCA_AVALIACOES = 10
+# Fração da probabilidade distribuída igualmente entre todos os jogos: sem ela,
+# jogos sem avaliações (peso zero) nunca seriam sorteados
+MISTURA_UNIFORME = 0.1
+
+
+class TabelaAlias:
+    """
+    Tabela alias sobre um conjunto de linhas do catálogo
+
+    Args:
+        linhas: Posições do catálogo que podem ser sorteadas
+        pesos: Peso (>= 0) de cada linha, na mesma ordem
+    """
+
+    def __init__(self, linhas: np.ndarray, pesos: np.ndarray):
+        pesos = np.asarray(pesos, dtype=np.float64)
+        positivos = pesos > 0
+        self.linhas = np.asarray(linhas, dtype=np.int64)[positivos]
+        pesos = pesos[positivos]
+        n = len(pesos)
+
+        self.probabilidade = np.ones(n, dtype=np.float64)
+        self.alias = np.arange(n, dtype=np.int64)
+        self._pesos = pesos / pesos.sum() if n else pesos
+        if n == 0:
+            return
+
+        escala = self._pesos * n
+        pequenos = [i for i in range(n) if escala[i] < 1.0]
+        grandes = [i for i in range(n) if escala[i] >= 1.0]
+        while pequenos and grandes:
+            menor = pequenos.pop()
+            maior = grandes[-1]
+            self.probabilidade[menor] = escala[menor]
+            self.alias[menor] = maior
+            escala[maior] -= 1.0 - escala[menor]
+            if escala[maior] < 1.0:
+                pequenos.append(grandes.pop())
+        # Sobras (erro de arredondamento) ficam com probabilidade 1
+
+    def __len__(self) -> int:
+        return len(self.linhas)
+
+    def sortear(self, rng: np.random.Generator) -> int:
+        """Uma posição do catálogo, proporcional ao peso"""
+        i = int(rng.integers(len(self.linhas)))
+        if rng.random() >= self.probabilidade[i]:
+            i = int(self.alias[i])
+        return int(self.linhas[i])
+
+    def sortear_distintos(self, quantidade: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        `quantidade` posições distintas, sem reposição
+
+        Sorteia por rejeição (descarta repetidas), que é O(quantidade) enquanto
+        a quantidade for pequena perto do total. Se as rejeições se acumulam
+        (poucos jogos ou pesos muito concentrados), recorre ao sorteio sem
+        reposição do NumPy, que é O(n).
+        """
+        n = len(self.linhas)
+        quantidade = min(quantidade, n)
+        if quantidade <= 0:
+            return np.empty(0, dtype=np.int64)
+
+        escolhidos = {}
+        tentativas = 0
+        while len(escolhidos) < quantidade and tentativas < 8 * quantidade + 16:
+            escolhidos.setdefault(self.sortear(rng), None)
+            tentativas += 1
+        if len(escolhidos) == quantidade:
+            return np.fromiter(escolhidos, dtype=np.int64, count=quantidade)
+
+        indices = rng.choice(n, size=quantidade, replace=False, p=self._pesos)
+        return self.linhas[indices]
+
+
+def pesos_descoberta(df: pd.DataFrame, peso: str) -> np.ndarray:
+    """
+    Peso de cada jogo do catálogo para o modo de descoberta
+
+    - popularidade: log(1 + total de avaliações). A contagem bruta faria os
+      poucos sucessos do catálogo aparecerem quase sempre.
+    - avaliacao: nota acima do mínimo (1-5 -> 0-4), reduzida para jogos com
+      poucas avaliações (total / (total + CONFIANCA_AVALIACOES)).
+    - uniforme: todos iguais.
+    """
+    total = pd.to_numeric(df['total_avaliacoes'], errors='coerce').fillna(0).to_numpy(np.float64)
+    if peso == PESO_POPULARIDADE:
+        return np.log1p(total)
+    if peso == PESO_AVALIACAO:
+        nota = pd.to_numeric(df['nota_media'], errors='coerce').fillna(1).to_numpy(np.float64)
+        return (nota - 1.0) * total / (total + CONFIANCA_AVALIACOES)
+    return np.ones(len(df), dtype=np.float64)
+
+
+def misturar_uniforme(pesos: np.ndarray, fracao: float = MISTURA_UNIFORME) -> np.ndarray:
+    """
+    Probabilidades (1 - fracao) * pesos normalizados + fracao / n
+
+    Todo jogo fica com probabilidade de pelo menos fracao / n. Se todos os
+    pesos forem zero, o resultado é uniforme.
+    """
+    n = len(pesos)
+    soma = pesos.sum()
+    if n == 0 or soma <= 0:
+        return np.full(n, 1.0 / n) if n else pesos
+    return (1.0 - fracao) * pesos / soma + fracao / n
+
+
+def criar_tabela(df: pd.DataFrame, peso: str, mascara: Optional[np.ndarray] = None) -> TabelaAlias:
+    """Tabela alias do catálogo (ou das linhas permitidas pela máscara)"""
+    pesos = pesos_descoberta(df, peso)
+    linhas = np.arange(len(df)) if mascara is None else np.flatnonzero(mascara)
+    return TabelaAlias(linhas, misturar_uniforme(pesos[linhas]))
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Feed de alterações dos contadores de avaliação
+O pubsub_worker publica, após cada commit, eventos compactos por jogo:
+
+    {"game_id": 42, "positive": 1200, "negative": 80,
+     "delta_positive": 1, "delta_negative": 0, "ts": 1700000000.0}
+
+e as instâncias da API os aplicam no games_df em memória, sem recarregar a
+base. Backends (FEED_BACKEND):
+
+- unix (padrão): sockets Unix de datagrama em FEED_DIR. Cada instância da API
+  cria o seu socket no diretório e o worker envia para todos. Serve para
+  API e worker na mesma máquina.
+- pubsub: tópico secundário do Pub/Sub (GCP_PUBSUB_FEED_TOPIC). Cada
+  instância da API precisa da sua própria assinatura (GCP_PUBSUB_FEED_SUB).
+- nenhum: desativado.
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+FEED_BACKEND = os.getenv("FEED_BACKEND", "unix")
+FEED_DIR = os.getenv("FEED_DIR", "/tmp/gamelist-feed")
+# Eventos por datagrama (mantém cada envio bem abaixo do limite do socket)
+EVENTOS_POR_DATAGRAMA = 200
+TAMANHO_MAX_DATAGRAMA = 65536
+
+
+def criar_evento(game_id: int, positive: int, negative: int,
+                 delta_positive: int = 0, delta_negative: int = 0) -> Dict[str, object]:
+    return {
+        "game_id": int(game_id),
+        "positive": int(positive),
+        "negative": int(negative),
+        "delta_positive": int(delta_positive),
+        "delta_negative": int(delta_negative),
+        "ts": time.time(),
+    }
+
+
+# ================================================================
+# PUBLICADORES (lado do worker)
+# ================================================================
+
+class PublicadorNulo:
+    def publicar(self, eventos: List[Dict[str, object]]):
+        pass
+
+
+class PublicadorUnix:
+    """Envia os eventos para todos os sockets de API registrados em FEED_DIR"""
+
+    def __init__(self, diretorio: str = FEED_DIR):
+        self.diretorio = diretorio
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+
+    def publicar(self, eventos: List[Dict[str, object]]):
+        if not eventos:
+            return
+        destinos = glob.glob(os.path.join(self.diretorio, "*.sock"))
+        for inicio in range(0, len(eventos), EVENTOS_POR_DATAGRAMA):
+            datagrama = json.dumps(eventos[inicio:inicio + EVENTOS_POR_DATAGRAMA]).encode("utf-8")
+            for destino in destinos:
+                try:
+                    self._socket.sendto(datagrama, destino)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Instância da API encerrada sem remover o socket
+                    try:
+                        os.unlink(destino)
+                    except OSError:
+                        pass
+                except (BlockingIOError, OSError) as e:
+                    # Feed é melhor-esforço: a instância atrasada se corrige no próximo evento do jogo
+                    logger.warning(f"⚠️ Evento do feed descartado para {destino}: {e}")
+
+
+class PublicadorPubSub:
+    """Publica os eventos em um tópico secundário do Pub/Sub"""
+
+    def __init__(self, topico: str = None):
+        from google.cloud import pubsub_v1
+        self.topico = topico or os.getenv("GCP_PUBSUB_FEED_TOPIC")
+        if not self.topico:
+            raise RuntimeError("GCP_PUBSUB_FEED_TOPIC deve estar definido para FEED_BACKEND=pubsub")
+        self._publisher = pubsub_v1.PublisherClient()
+
+    def publicar(self, eventos: List[Dict[str, object]]):
+        for inicio in range(0, len(eventos), EVENTOS_POR_DATAGRAMA):
+            dados = json.dumps(eventos[inicio:inicio + EVENTOS_POR_DATAGRAMA]).encode("utf-8")
+            # Não aguarda a confirmação: o worker não deve esperar pelo feed
+            self._publisher.publish(self.topico, dados)
+
+
+def criar_publicador(backend: str = None):
+    backend = backend or FEED_BACKEND
+    if backend == "unix":
+        return PublicadorUnix()
+    if backend == "pubsub":
+        return PublicadorPubSub()
+    return PublicadorNulo()
+
+
+# ================================================================
+# ASSINANTES (lado da API)
+# ================================================================
+
+class AssinanteUnix:
+    """Socket de datagrama próprio desta instância em FEED_DIR"""
+
+    def __init__(self, diretorio: str = FEED_DIR):
+        self.diretorio = diretorio
+        self.caminho = os.path.join(diretorio, f"api-{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self._socket = None
+        self._thread = None
+
+    def iniciar(self, callback: Callable[[List[Dict[str, object]]], None]):
+        os.makedirs(self.diretorio, exist_ok=True)
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self.caminho)
+        atexit.register(self.encerrar)
+        self._thread = threading.Thread(
+            target=self._escutar, args=(callback,), name="feed-alteracoes", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"📡 Feed de alterações ouvindo em {self.caminho}")
+
+    def _escutar(self, callback):
+        while True:
+            try:
+                datagrama = self._socket.recv(TAMANHO_MAX_DATAGRAMA)
+            except OSError:
+                return  # socket fechado
+            try:
+                callback(json.loads(datagrama))
+            except Exception:
+                logger.exception("❌ Erro ao aplicar evento do feed")
+
+    def encerrar(self):
+        if self._socket is not None:
+            self._socket.close()
+        try:
+            os.unlink(self.caminho)
+        except OSError:
+            pass
+
+
+class AssinantePubSub:
+    """Assinatura (exclusiva desta instância) do tópico secundário"""
+
+    def __init__(self, assinatura: str = None):
+        self.assinatura = assinatura or os.getenv("GCP_PUBSUB_FEED_SUB")
+        if not self.assinatura:
+            raise RuntimeError("GCP_PUBSUB_FEED_SUB deve estar definido para FEED_BACKEND=pubsub")
+        self._future = None
+
+    def iniciar(self, callback: Callable[[List[Dict[str, object]]], None]):
+        from google.cloud import pubsub_v1
+
+        def receber(message):
+            try:
+                callback(json.loads(message.data.decode("utf-8")))
+            except Exception:
+                logger.exception("❌ Erro ao aplicar evento do feed")
+            # Evento perdido é corrigido pelo próximo evento do mesmo jogo
+            message.ack()
+
+        subscriber = pubsub_v1.SubscriberClient()
+        self._future = subscriber.subscribe(self.assinatura, callback=receber)
+        logger.info(f"📡 Feed de alterações ouvindo em {self.assinatura}")
+
+    def encerrar(self):
+        if self._future is not None:
+            self._future.cancel()
+
+
+def criar_assinante(backend: str = None):
+    """Retorna o assinante configurado ou None se o feed estiver desativado"""
+    backend = backend or FEED_BACKEND
+    if backend == "unix":
+        return AssinanteUnix()
+    if backend == "pubsub":
+        return AssinantePubSub()
+    return None
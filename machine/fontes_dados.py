@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+Fontes de dados do catálogo de jogos
+O SistemaRecomendacaoGames carrega o games_df de uma fonte plugável
+(FONTE_DADOS):
+
+- mysql (padrão): tabela `games` do MySQL Azure.
+- arquivo: CSV (ex.: others/games_blt3.csv) ou arquivo colunar
+  Parquet/Feather (Arrow), em FONTE_DADOS_ARQUIVO. Só as colunas pedidas são
+  lidas; com pyarrow instalado, as colunas de texto ficam em buffers Arrow
+  (Feather é mapeado em memória sem cópia).
+- simulada: os 10 jogos de teste.
+
+Conversão do CSV para o formato colunar (uma vez, fora da API):
+    python fontes_dados.py others/games_blt3.csv others/games_blt3.parquet
+"""
+
+import logging
+import os
+import sys
+from typing import Callable, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_BASE = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_PADRAO = os.path.join(DIRETORIO_BASE, 'others', 'games_blt3.csv')
+
+FONTE_MYSQL = 'mysql'
+FONTE_ARQUIVO = 'arquivo'
+FONTE_SIMULADA = 'simulada'
+
+# Colunas do catálogo, na ordem da tabela `games`
+COLUNAS_JOGO = (
+    'id', 'name', 'release_date', 'required_age', 'price', 'header_image',
+    'positive', 'negative', 'recommendations', 'genres', 'categories', 'description'
+)
+COLUNAS_INTEIRAS = ('id', 'required_age', 'positive', 'negative', 'recommendations')
+COLUNAS_TEXTO = ('name', 'header_image', 'genres', 'categories', 'description')
+
+EXTENSOES_PARQUET = ('.parquet', '.pq')
+EXTENSOES_FEATHER = ('.feather', '.arrow')
+
+
+def _pyarrow_disponivel() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+# ================================================================
+# MYSQL
+# ================================================================
+
+class FonteMySQL:
+    """Lê o catálogo da tabela `games` (só as colunas pedidas)"""
+
+    nome = FONTE_MYSQL
+
+    def __init__(self, conectar: Callable[[], object], tabela: str = 'games'):
+        self.conectar = conectar
+        self.tabela = tabela
+
+    def carregar(self, colunas: Optional[Iterable[str]] = None) -> Optional[pd.DataFrame]:
+        """Retorna o DataFrame ou None se o MySQL não estiver disponível"""
+        from mysql.connector import Error
+
+        logger.info("📁 Carregando base de dados do MySQL...")
+        connection = self.conectar()
+        if not connection:
+            return None
+
+        try:
+            query = f"SELECT {', '.join(colunas or COLUNAS_JOGO)} FROM {self.tabela}"
+            df = pd.read_sql(query, connection)
+            logger.info(f"✅ Base carregada do MySQL: {len(df)} jogos")
+            return df
+        except Error as e:
+            logger.error(f"❌ Erro ao carregar dados: {e}")
+            return None
+        finally:
+            if connection.is_connected():
+                connection.close()
+
+
+# ================================================================
+# ARQUIVO (CSV / PARQUET / FEATHER)
+# ================================================================
+
+class FonteArquivo:
+    """
+    Lê o catálogo de um arquivo local. O CSV do projeto não tem a coluna id:
+    os jogos são numerados 1..n na ordem do arquivo, como o AUTO_INCREMENT do
+    LOAD DATA em others/games_blt3_create_import.sql.
+    """
+
+    nome = FONTE_ARQUIVO
+
+    def __init__(self, caminho: str = ARQUIVO_PADRAO):
+        self.caminho = caminho
+
+    @property
+    def formato(self) -> str:
+        extensao = os.path.splitext(self.caminho)[1].lower()
+        if extensao in EXTENSOES_PARQUET:
+            return 'parquet'
+        if extensao in EXTENSOES_FEATHER:
+            return 'feather'
+        return 'csv'
+
+    def carregar(self, colunas: Optional[Iterable[str]] = None) -> Optional[pd.DataFrame]:
+        """Retorna o DataFrame tipado ou None se o arquivo não puder ser lido"""
+        colunas = list(colunas or COLUNAS_JOGO)
+        logger.info(f"📁 Carregando base do arquivo {self.caminho} ({self.formato})...")
+        try:
+            if self.formato == 'csv':
+                df = self._ler_csv(colunas)
+            else:
+                df = self._ler_colunar(colunas)
+        except (OSError, ValueError, ImportError) as e:
+            logger.error(f"❌ Erro ao ler {self.caminho}: {e}")
+            return None
+
+        df = normalizar_catalogo(df, colunas)
+        logger.info(f"✅ Base carregada do arquivo: {len(df)} jogos")
+        return df
+
+    def _ler_csv(self, colunas: List[str]) -> pd.DataFrame:
+        disponiveis = pd.read_csv(self.caminho, nrows=0).columns
+        lidas = [coluna for coluna in colunas if coluna in disponiveis]
+        # Leitor C do pandas: linhas sem os últimos campos (há jogos sem description)
+        # viram nulos, como no LOAD DATA; o leitor CSV do Arrow as rejeitaria
+        if _pyarrow_disponivel():
+            return pd.read_csv(self.caminho, usecols=lidas, dtype_backend='pyarrow')
+        tipos = {coluna: 'string' for coluna in COLUNAS_TEXTO if coluna in lidas}
+        tipos['release_date'] = 'string'
+        return pd.read_csv(self.caminho, usecols=lidas, dtype=tipos)
+
+    def _ler_colunar(self, colunas: List[str]) -> pd.DataFrame:
+        import pyarrow as pa
+
+        if self.formato == 'parquet':
+            import pyarrow.parquet as pq
+            disponiveis = pq.read_schema(self.caminho).names
+            lidas = [coluna for coluna in colunas if coluna in disponiveis]
+            tabela = pq.read_table(self.caminho, columns=lidas, memory_map=True)
+        else:
+            import pyarrow.feather as feather
+            with pa.memory_map(self.caminho) as origem:
+                disponiveis = pa.ipc.open_file(origem).schema.names
+            lidas = [coluna for coluna in colunas if coluna in disponiveis]
+            # Feather sem compressão: os buffers apontam direto para o arquivo mapeado
+            tabela = feather.read_table(self.caminho, columns=lidas, memory_map=True)
+        return tabela.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def normalizar_catalogo(df: pd.DataFrame, colunas: List[str]) -> pd.DataFrame:
+    """
+    Aplica os tipos do catálogo às colunas lidas de arquivo
+
+    - inteiros/preço: arrays NumPy (usados nas contas do modelo), nulos = 0;
+    - release_date: texto ISO (AAAA-MM-DD), aceitando o AAAAMMDD do CSV;
+    - textos: mantêm o tipo lido (Arrow quando disponível), nulos = ''.
+    """
+    if 'id' in colunas and 'id' not in df.columns:
+        df.insert(0, 'id', np.arange(1, len(df) + 1, dtype=np.int64))
+
+    for coluna in COLUNAS_INTEIRAS:
+        if coluna in df.columns:
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce').fillna(0).to_numpy(np.int64)
+    if 'price' in df.columns:
+        df['price'] = pd.to_numeric(df['price'], errors='coerce').fillna(0).to_numpy(np.float64)
+
+    if 'release_date' in df.columns:
+        texto = df['release_date'].astype(object).astype(str).str.replace(r'\.0$', '', regex=True)
+        datas = pd.to_datetime(texto, format='%Y%m%d', errors='coerce')
+        datas = datas.fillna(pd.to_datetime(texto, format='%Y-%m-%d', errors='coerce'))
+        df['release_date'] = datas.dt.strftime('%Y-%m-%d').fillna('').astype(object)
+
+    for coluna in COLUNAS_TEXTO:
+        if coluna in df.columns:
+            df[coluna] = df[coluna].fillna('')
+
+    return df[[coluna for coluna in colunas if coluna in df.columns]]
+
+
+def converter_arquivo(origem: str, destino: str) -> pd.DataFrame:
+    """
+    Converte o catálogo (normalmente o CSV) para Parquet ou Feather,
+    já com id e tipos definitivos
+    """
+    import pyarrow as pa
+
+    df = FonteArquivo(origem).carregar()
+    if df is None:
+        raise ValueError(f"Não foi possível ler {origem}")
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    extensao = os.path.splitext(destino)[1].lower()
+    if extensao in EXTENSOES_FEATHER:
+        import pyarrow.feather as feather
+        # Sem compressão, para permitir leitura mapeada sem cópia
+        feather.write_feather(tabela, destino, compression='uncompressed')
+    else:
+        import pyarrow.parquet as pq
+        pq.write_table(tabela, destino)
+    logger.info(f"✅ {len(df)} jogos gravados em {destino}")
+    return df
+
+
+# ================================================================
+# SELEÇÃO DA FONTE
+# ================================================================
+
+def criar_fonte(tipo: Optional[str] = None, conectar: Optional[Callable[[], object]] = None):
+    """
+    Retorna a fonte configurada em FONTE_DADOS (None = dados simulados)
+
+    Args:
+        tipo: mysql, arquivo ou simulada (padrão: FONTE_DADOS)
+        conectar: Função que abre a conexão MySQL (fonte mysql)
+    """
+    tipo = (tipo or os.getenv('FONTE_DADOS', FONTE_MYSQL)).lower()
+    if tipo == FONTE_ARQUIVO:
+        return FonteArquivo(os.getenv('FONTE_DADOS_ARQUIVO', ARQUIVO_PADRAO))
+    if tipo == FONTE_SIMULADA:
+        return None
+    if tipo != FONTE_MYSQL:
+        logger.warning(f"⚠️ FONTE_DADOS desconhecida '{tipo}', usando MySQL")
+    return FonteMySQL(conectar)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    if len(sys.argv) != 3:
+        print("Uso: python fontes_dados.py <origem.csv> <destino.parquet|destino.feather>")
+        sys.exit(1)
+
+    converter_arquivo(sys.argv[1], sys.argv[2])
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Inicialização preguiçosa da API e perfil de tempo de startup
+
+- CarregadorSistema: cria o SistemaRecomendacaoGames sob demanda ou em
+  segundo plano, para que importar a API não custe segundos.
+- PerfilInicializacao: registra quanto tempo cada fase levou.
+- Executado diretamente, gera um relatório de importação/startup:
+    python inicializacao.py
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Modos de aquecimento do modelo
+AQUECIMENTO_SEGUNDO_PLANO = "segundo_plano"  # thread começa ao criar o app
+AQUECIMENTO_SOB_DEMANDA = "sob_demanda"      # só na primeira requisição
+AQUECIMENTO_IMEDIATO = "imediato"            # bloqueia até o modelo ficar pronto
+
+
+class PerfilInicializacao:
+    """Acumula a duração das fases de inicialização"""
+
+    def __init__(self):
+        self.fases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, fase: str, segundos: float):
+        with self._lock:
+            self.fases[fase] = round(segundos, 4)
+
+    def medir(self, fase: str):
+        """Context manager que registra a duração do bloco"""
+        perfil = self
+
+        class _Medicao:
+            def __enter__(self):
+                self.inicio = time.perf_counter()
+                return self
+
+            def __exit__(self, *exc):
+                perfil.registrar(fase, time.perf_counter() - self.inicio)
+                return False
+
+        return _Medicao()
+
+    def relatorio(self) -> Dict[str, object]:
+        """Fases medidas em segundos (fases 'sistema.*' estão contidas em 'criar_sistema')"""
+        with self._lock:
+            return {"fases_s": dict(self.fases)}
+
+
+class CarregadorSistema:
+    """
+    Guarda o SistemaRecomendacaoGames e o cria apenas uma vez,
+    na primeira chamada a obter() ou em uma thread de aquecimento.
+    """
+
+    def __init__(self, fabrica: Callable[[], object], perfil: Optional[PerfilInicializacao] = None):
+        self._fabrica = fabrica
+        self._perfil = perfil or PerfilInicializacao()
+        self._sistema = None
+        self._erro = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._ao_ficar_pronto = []
+        # time.time() do início da criação: eventos anteriores já estão nos dados carregados
+        self.inicio_criacao = None
+
+    def ao_ficar_pronto(self, funcao: Callable[[object], None]):
+        """Registra uma função chamada com o sistema logo depois de ele ficar pronto"""
+        self._ao_ficar_pronto.append(funcao)
+
+    @property
+    def pronto(self) -> bool:
+        return self._sistema is not None
+
+    @property
+    def erro(self) -> Optional[BaseException]:
+        return self._erro
+
+    def _criar(self):
+        with self._lock:
+            if self._sistema is not None:
+                return self._sistema
+            logger.info("🔥 Criando sistema de recomendação...")
+            self.inicio_criacao = time.time()
+            try:
+                with self._perfil.medir("criar_sistema"):
+                    sistema = self._fabrica()
+            except Exception as e:
+                self._erro = e
+                logger.exception("❌ Falha ao criar o sistema de recomendação")
+                raise
+            for fase, segundos in getattr(sistema, "tempos_inicializacao", {}).items():
+                self._perfil.registrar(f"sistema.{fase}", segundos)
+            self._erro = None
+            self._sistema = sistema
+            for funcao in self._ao_ficar_pronto:
+                try:
+                    funcao(sistema)
+                except Exception:
+                    logger.exception("❌ Falha ao executar ação de sistema pronto")
+            return sistema
+
+    def _aquecer(self):
+        try:
+            self._criar()
+        except Exception:
+            pass  # erro já registrado; a próxima chamada a obter() tenta de novo
+
+    def iniciar_aquecimento(self):
+        """Dispara a criação do sistema em segundo plano (idempotente)"""
+        if self.pronto or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._thread = threading.Thread(target=self._aquecer, name="aquecimento-modelo", daemon=True)
+        self._thread.start()
+
+    def obter(self):
+        """Retorna o sistema, criando-o (ou aguardando o aquecimento) se necessário"""
+        sistema = self._sistema
+        if sistema is not None:
+            return sistema
+        return self._criar()
+
+
+# ================================================================
+# RELATÓRIO DE IMPORTAÇÃO / STARTUP
+# ================================================================
+
+def perfil_importacao(modulo: str = "api_game", top: int = 15):
+    """
+    Mede as importações de um módulo em um processo separado (python -X importtime)
+
+    Returns:
+        Lista [(modulo, cumulativo_s)] ordenada pelos mais lentos
+    """
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    tempos = []
+    # Formato: "import time: <self us> | <cumulativo us> | <módulo>"
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha[len("import time:"):].split("|", 2)
+        tempos.append((nome.strip(), int(cumulativo) / 1e6))
+    tempos.sort(key=lambda t: t[1], reverse=True)
+    return tempos[:top]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    print("🧪 Perfil de inicialização da API")
+    print("=" * 50)
+
+    print("\n📦 Importações mais lentas de api_game (cumulativo):")
+    for nome, segundos in perfil_importacao("api_game"):
+        print(f"   {segundos:8.3f}s  {nome}")
+
+    inicio = time.perf_counter()
+    from api_game import create_app
+    app = create_app(aquecimento=AQUECIMENTO_IMEDIATO)
+    print(f"\n⏱️ create_app + aquecimento: {time.perf_counter() - inicio:.3f}s")
+
+    print("\n📊 Fases:")
+    for fase, segundos in app.extensions["perfil_inicializacao"].relatorio()["fases_s"].items():
+        print(f"   {segundos:8.3f}s  {fase}")
@@ -9,23 +9,85 @@ import numpy as np
 import mysql.connector
 from mysql.connector import Error
 import os
+import threading
+import time
 from typing import List, Dict, Any, Optional
 import logging
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
+from collections import OrderedDict
+from ann_game import MOTOR_EXATO, MOTOR_IVF, MOTORES_VIZINHOS, IndiceIVF
+from catalogo_compacto import compactar_catalogo
+from fontes_dados import FONTE_MYSQL, criar_fonte
+from descoberta import PESO_POPULARIDADE, criar_tabela
+from perfilamento import etapa
+from tendencias import ContadorTendencias, votos_recentes_mysql
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tabelas alias de descoberta mantidas em cache (combinações peso/categorias)
+DESCOBERTA_MAX_TABELAS = 64
+
+# Campos devolvidos por _formatar_jogo, na ordem da resposta
+CAMPOS_JOGO = (
+    'id', 'name', 'release_date', 'required_age', 'price', 'header_image',
+    'positive', 'negative', 'recommendations', 'genres', 'categories',
+    'description', 'nota_media', 'total_avaliacoes'
+)
+
 class SistemaRecomendacaoGames:
-    def __init__(self):
+    def __init__(self, fonte=None):
         """
         Inicializa o sistema de recomendação conectado ao MySQL
+        
+        Args:
+            fonte: Fonte do catálogo (ver fontes_dados); padrão: FONTE_DADOS
         """
         self.games_df = None
         self.model = None
         self.similarity_matrix = None
+        self._indice_ids = None
+        
+        # Motor de vizinhos: matriz exata n x n ou índice aproximado IVF (ann_game)
+        self.motor_vizinhos = os.getenv('MOTOR_VIZINHOS', MOTOR_EXATO).lower()
+        if self.motor_vizinhos not in MOTORES_VIZINHOS:
+            logger.warning(f"⚠️ MOTOR_VIZINHOS desconhecido '{self.motor_vizinhos}', usando {MOTOR_EXATO}")
+            self.motor_vizinhos = MOTOR_EXATO
+        self._indice_ann = None
+        self._posicoes_unicas = None
+        
+        # Layout compacto do catálogo (campos pesados ficam em disco mapeado)
+        self.catalogo_compacto = os.getenv('CATALOGO_COMPACTO', 'true').lower() == 'true'
+        self._armazem_frio = None
+        self.relatorio_memoria = None
+        
+        # Colunas usadas nos filtros de recomendação (ver _preparar_filtros)
+        self._filtro_preco = None
+        self._filtro_idade = None
+        self._filtro_lancamento = None
+        self._linhas_por_tag = {}
+        # Máscaras das tags mais usadas (LRU); tags desconhecidas usam uma única máscara vazia
+        self._mascaras_tag = OrderedDict()
+        self._mascara_vazia = None
+        self._lock_mascaras = threading.Lock()
+        self.max_mascaras_tag = int(os.getenv('MASCARAS_TAG_MAX', 256))
+        
+        # Incrementada a cada alteração de contadores aplicada em memória (ou recarga);
+        # faz parte da chave do cache curto das rotas (controle_admissao)
+        self.versao_contadores = 0
+        self._lock_contadores = threading.Lock()
+        
+        # Incrementada a cada _preparar_modelo (catálogo/modelo novos)
+        self.versao_modelo = 0
+        
+        # Tabelas alias da descoberta, válidas para uma versão do modelo
+        self._tabelas_alias = {}
+        self._versao_tabelas_alias = None
+        self._lock_alias = threading.Lock()
+        self._rng = np.random.default_rng()
+        
+        # Votos recentes por jogo (ranking de tendências), independentes do retreino
+        self.tendencias = ContadorTendencias()
         
         # Configurações do MySQL Azure
         self.db_config = {
@@ -36,8 +98,23 @@ class SistemaRecomendacaoGames:
             'port': os.getenv('AZURE_MYSQL_PORT', '3306')
         }
         
-        self._carregar_dados_mysql()
+        # Origem do catálogo: MySQL, arquivo CSV/Parquet ou simulada (None)
+        self.fonte = fonte if fonte is not None else criar_fonte(conectar=self._conectar_mysql)
+        
+        # Duração de cada fase (exposta no perfil de inicialização da API)
+        self.tempos_inicializacao = {}
+        
+        inicio = time.perf_counter()
+        self._carregar_dados()
+        self.tempos_inicializacao['carregar_dados'] = time.perf_counter() - inicio
+        
+        inicio = time.perf_counter()
         self._preparar_modelo()
+        self.tempos_inicializacao['preparar_modelo'] = time.perf_counter() - inicio
+        
+        inicio = time.perf_counter()
+        self._reconstruir_tendencias()
+        self.tempos_inicializacao['reconstruir_tendencias'] = time.perf_counter() - inicio
     
     def _conectar_mysql(self):
         """Conecta ao MySQL Azure com timeout curto"""
@@ -51,34 +128,33 @@ class SistemaRecomendacaoGames:
             logger.error(f"❌ Erro ao conectar ao MySQL: {e}")
             return None
     
-    def _carregar_dados_mysql(self):
-        """Carrega os dados dos games do MySQL ou usa dados simulados"""
-        logger.info("📁 Carregando base de dados do MySQL...")
-        
-        connection = self._conectar_mysql()
-        if not connection:
-            logger.warning("⚠️ MySQL não disponível, usando dados simulados")
+    def _reconstruir_tendencias(self):
+        """
+        Recalcula os votos recentes a partir de game_ratings (mesmo banco do
+        catálogo). Cobre também os eventos do feed recebidos antes do modelo
+        ficar pronto, que a API descarta.
+        """
+        if getattr(self.fonte, 'nome', None) != FONTE_MYSQL:
+            return
+        votos = votos_recentes_mysql(self._conectar_mysql, self.tendencias.meia_vida_horas)
+        if votos is None:
+            logger.warning("⚠️ Tendências começam vazias (game_ratings indisponível)")
+            return
+        self.tendencias.reconstruir(votos)
+        logger.info(f"✅ Tendências reconstruídas: {len(votos)} jogos com votos recentes")
+    
+    def _carregar_dados(self):
+        """Carrega os dados dos games da fonte configurada ou usa dados simulados"""
+        if self.fonte is None:
             self._carregar_dados_simulados()
             return
         
-        try:
-            query = """
-            SELECT 
-                id, name, release_date, required_age, price, header_image,
-                positive, negative, recommendations, genres, categories, description
-            FROM games
-            """
-            
-            self.games_df = pd.read_sql(query, connection)
-            logger.info(f"✅ Base carregada do MySQL: {len(self.games_df)} jogos")
-            
-        except Error as e:
-            logger.error(f"❌ Erro ao carregar dados: {e}")
-            logger.warning("⚠️ Usando dados simulados")
+        df = self.fonte.carregar()
+        if df is None:
+            logger.warning(f"⚠️ Fonte '{self.fonte.nome}' não disponível, usando dados simulados")
             self._carregar_dados_simulados()
-        finally:
-            if connection.is_connected():
-                connection.close()
+            return
+        self.games_df = df
     
     def _carregar_dados_simulados(self):
         """Carrega dados simulados para testes"""
@@ -172,8 +248,12 @@ class SistemaRecomendacaoGames:
     def _calcular_similaridade_conteudo(self):
         """
         Calcula matriz de similaridade entre jogos baseado em categorias e gêneros
-        Usa TF-IDF para comparar conteúdo
+        Usa TF-IDF para comparar conteúdo (com MOTOR_VIZINHOS=ivf, monta o índice aproximado no lugar da matriz)
         """
+        # scikit-learn leva segundos para importar; só é carregado ao treinar
+        from sklearn.metrics.pairwise import cosine_similarity
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        
         # Combinar categorias e gêneros
         conteudo = self.games_df['categories'].fillna('') + ' ' + self.games_df['genres'].fillna('')
         
@@ -181,7 +261,19 @@ class SistemaRecomendacaoGames:
         vectorizer = TfidfVectorizer(analyzer='char', ngram_range=(2, 2))
         tfidf_matrix = vectorizer.fit_transform(conteudo)
         
+        if self.motor_vizinhos == MOTOR_IVF:
+            # Sem matriz n x n: as linhas do TF-IDF já têm norma L2 = 1 (cosseno = produto escalar)
+            inicio = time.perf_counter()
+            self._indice_ann = IndiceIVF(tfidf_matrix.toarray())
+            self.similarity_matrix = None
+            logger.info(
+                f"✅ Índice IVF montado: {self._indice_ann.listas} listas, "
+                f"{self._indice_ann.sondagens} sondagens ({time.perf_counter() - inicio:.2f}s)"
+            )
+            return
+        
         # Calcular similaridade cosseno
+        self._indice_ann = None
         self.similarity_matrix = cosine_similarity(tfidf_matrix)
         logger.info("✅ Matriz de similaridade calculada com sucesso")
     
@@ -189,6 +281,9 @@ class SistemaRecomendacaoGames:
         """Prepara o modelo de recomendação baseado em similaridade de conteúdo"""
         logger.info("🤖 Preparando modelo de recomendação...")
         
+        # Posição da linha no DataFrame = linha na matriz de similaridade
+        self.games_df = self.games_df.reset_index(drop=True)
+        
         # Calcular métricas para exibição
         self.games_df['nota_media'] = self.games_df.apply(
             lambda x: self._calcular_nota_media(
@@ -205,9 +300,231 @@ class SistemaRecomendacaoGames:
         # Calcular similaridade de conteúdo
         self._calcular_similaridade_conteudo()
         
+        if self.catalogo_compacto:
+            self._compactar_catalogo()
+        self._indexar_ids()
+        self._preparar_filtros()
+        self.versao_modelo += 1
+        
         logger.info("✅ Modelo preparado com sucesso!")
         logger.info(f"📊 Total de jogos: {len(self.games_df)}")
     
+    def _compactar_catalogo(self):
+        """Converte o games_df para o layout compacto e troca o armazém frio"""
+        armazem_antigo = self._armazem_frio
+        self.games_df, self._armazem_frio, self.relatorio_memoria = compactar_catalogo(
+            self.games_df, os.getenv('CATALOGO_FRIO_DIR') or None
+        )
+        if armazem_antigo is not None:
+            armazem_antigo.descartar()
+    
+    def _campo_frio(self, jogo_series, campo: str):
+        """Lê um campo pesado da linha ou, no catálogo compacto, do armazém frio"""
+        if campo in jogo_series.index or self._armazem_frio is None:
+            return jogo_series.get(campo, '')
+        return self._armazem_frio.ler(campo, jogo_series.name)
+    
+    def _preparar_filtros(self):
+        """
+        Pré-calcula as colunas usadas nos filtros de recomendação:
+        arrays de preço/idade/lançamento e um índice invertido tag -> linhas
+        (tags = itens de categories e genres, sem diferenciar maiúsculas)
+        """
+        df = self.games_df
+        self._filtro_preco = pd.to_numeric(df['price'], errors='coerce').fillna(0).to_numpy(np.float32)
+        self._filtro_idade = pd.to_numeric(df['required_age'], errors='coerce').fillna(0).to_numpy(np.int32)
+        self._filtro_lancamento = pd.to_datetime(
+            df['release_date'].astype(object).astype(str), errors='coerce', format='mixed'
+        ).to_numpy(dtype='datetime64[ns]')
+        
+        # Linhas com o mesmo texto de tags são tratadas juntas
+        conteudo = df['categories'].astype(object).fillna('').astype(str) + ',' + \
+            df['genres'].astype(object).fillna('').astype(str)
+        codigos, textos = pd.factorize(conteudo)
+        ordem = np.argsort(codigos, kind='stable')
+        limites = np.searchsorted(codigos[ordem], np.arange(len(textos) + 1))
+        
+        partes_por_tag = {}
+        for codigo, texto in enumerate(textos):
+            linhas = ordem[limites[codigo]:limites[codigo + 1]]
+            for tag in {t.strip().lower() for t in texto.split(',') if t.strip()}:
+                partes_por_tag.setdefault(tag, []).append(linhas)
+        
+        self._linhas_por_tag = {
+            tag: np.sort(np.concatenate(partes)) for tag, partes in partes_por_tag.items()
+        }
+        self._mascara_vazia = np.zeros(len(self.games_df), dtype=bool)
+        self._mascara_vazia.setflags(write=False)
+        with self._lock_mascaras:
+            self._mascaras_tag = OrderedDict()
+    
+    def _mascara_tag(self, tag: str) -> np.ndarray:
+        """Máscara booleana (uma posição por jogo, somente leitura) dos jogos que têm a tag"""
+        tag = tag.strip().lower()
+        linhas = self._linhas_por_tag.get(tag)
+        if linhas is None:
+            return self._mascara_vazia
+        with self._lock_mascaras:
+            mascara = self._mascaras_tag.get(tag)
+            if mascara is not None:
+                self._mascaras_tag.move_to_end(tag)
+                return mascara
+        mascara = np.zeros(len(self.games_df), dtype=bool)
+        mascara[linhas] = True
+        mascara.setflags(write=False)
+        with self._lock_mascaras:
+            self._mascaras_tag[tag] = mascara
+            while len(self._mascaras_tag) > self.max_mascaras_tag:
+                self._mascaras_tag.popitem(last=False)
+        return mascara
+    
+    def _mascara_filtros(self, filtros: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Combina os filtros em uma única máscara booleana sobre o catálogo
+        
+        Args:
+            filtros: Dicionário com as chaves opcionais
+                preco_max, idade_max, tags (todas obrigatórias),
+                excluir_tags, lancamento_de, lancamento_ate (datas ISO)
+                
+        Returns:
+            Máscara (True = jogo permitido) ou None se não há filtros
+        """
+        if not filtros:
+            return None
+        
+        with etapa('filtros'):
+            mascara = np.ones(len(self.games_df), dtype=bool)
+            if filtros.get('preco_max') is not None:
+                mascara &= self._filtro_preco <= float(filtros['preco_max'])
+            if filtros.get('idade_max') is not None:
+                mascara &= self._filtro_idade <= int(filtros['idade_max'])
+            for tag in filtros.get('tags') or []:
+                mascara &= self._mascara_tag(tag)
+            for tag in filtros.get('excluir_tags') or []:
+                mascara &= ~self._mascara_tag(tag)
+            if filtros.get('lancamento_de'):
+                mascara &= self._filtro_lancamento >= np.datetime64(filtros['lancamento_de'], 'ns')
+            if filtros.get('lancamento_ate'):
+                mascara &= self._filtro_lancamento <= np.datetime64(filtros['lancamento_ate'], 'ns')
+        return mascara
+    
+    def _indexar_ids(self):
+        """Monta o índice id -> posição usado nas buscas vetorizadas"""
+        ids = self.games_df['id'].to_numpy()
+        primeiros = ~pd.Index(ids).duplicated()
+        self._indice_ids = pd.Index(ids[primeiros])
+        self._posicoes_unicas = np.flatnonzero(primeiros)
+    
+    def _posicoes_por_ids(self, ids: List[int]) -> np.ndarray:
+        """
+        Converte IDs de jogos em posições no DataFrame de uma só vez
+        
+        Returns:
+            Array com a posição de cada ID (-1 quando o ID não existe)
+        """
+        try:
+            chaves = np.asarray(ids, dtype=np.int64)
+        except OverflowError:
+            # IDs fora do intervalo de int64 não existem no catálogo
+            limites = np.iinfo(np.int64)
+            dentro = np.array([limites.min <= int(i) <= limites.max for i in ids], dtype=bool)
+            posicoes = np.full(len(dentro), -1, dtype=np.int64)
+            posicoes[dentro] = self._posicoes_por_ids([i for i, ok in zip(ids, dentro) if ok])
+            return posicoes
+        encontrados = self._indice_ids.get_indexer(chaves)
+        return np.where(encontrados >= 0, self._posicoes_unicas[encontrados], -1)
+    
+    def _similaridades(self, posicoes: np.ndarray) -> np.ndarray:
+        """Retorna as linhas da matriz de similaridade (uma por posição)"""
+        return np.array(self.similarity_matrix[posicoes], dtype=np.float64)
+    
+    def _top_k(self, scores: np.ndarray, limite: int) -> List[np.ndarray]:
+        """
+        Seleciona as `limite` maiores pontuações de cada linha
+        
+        Args:
+            scores: Matriz (consultas x jogos); posições com -inf são ignoradas
+            limite: Quantidade de jogos por linha
+            
+        Returns:
+            Lista (uma por linha) de arrays de posições em ordem decrescente
+        """
+        k = min(limite, scores.shape[1])
+        if k <= 0:
+            return [np.empty(0, dtype=np.int64) for _ in range(scores.shape[0])]
+        
+        # argpartition é O(n) por linha; só os k escolhidos são ordenados
+        candidatos = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        valores = np.take_along_axis(scores, candidatos, axis=1)
+        ordem = np.argsort(-valores, axis=1, kind='stable')
+        candidatos = np.take_along_axis(candidatos, ordem, axis=1)
+        valores = np.take_along_axis(valores, ordem, axis=1)
+        return [linha[np.isfinite(vals)] for linha, vals in zip(candidatos, valores)]
+    
+    def _recomendar_posicoes(self, posicoes: np.ndarray, limite: int,
+                             mascara: Optional[np.ndarray] = None) -> List[np.ndarray]:
+        """
+        Calcula os vizinhos de várias posições em uma única passada matricial
+        
+        Args:
+            posicoes: Posições dos jogos base
+            limite: Vizinhos por jogo base
+            mascara: Jogos permitidos (aplicada antes do top-k, então a
+                página vem cheia sempre que houver jogos suficientes)
+        """
+        with etapa('similaridade'):
+            indice = self._indice_ann
+            if indice is not None:
+                return [indice.buscar(int(posicao), limite, mascara) for posicao in posicoes]
+            scores = self._similaridades(posicoes)
+            if mascara is not None:
+                scores[:, ~mascara] = -np.inf
+            # O próprio jogo nunca é recomendado para ele mesmo
+            scores[np.arange(len(posicoes)), posicoes] = -np.inf
+            return self._top_k(scores, limite)
+    
+    def _recomendar_agregado(self, posicoes: np.ndarray, pesos: np.ndarray, limite: int,
+                             mascara: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Vizinhos de um conjunto de jogos: a pontuação de cada jogo é a soma
+        ponderada das similaridades com as sementes (peso negativo afasta)
+        
+        Com o índice IVF a soma é feita nos vetores de conteúdo, o que dá a
+        mesma pontuação (o cosseno é linear no vetor de consulta).
+        """
+        with etapa('similaridade'):
+            indice = self._indice_ann
+            if indice is not None:
+                consulta = pesos.astype(np.float32) @ indice.vetor(posicoes)
+                return indice.buscar_vetor(consulta, limite, mascara, excluir=posicoes)
+            scores = (pesos @ self._similaridades(posicoes))[np.newaxis, :]
+            if mascara is not None:
+                scores[:, ~mascara] = -np.inf
+            # Sementes (positivas e negativas) nunca são recomendadas
+            scores[0, posicoes] = -np.inf
+            return self._top_k(scores, limite)[0]
+    
+    def _tabela_alias(self, peso: str, categorias: Optional[List[str]] = None):
+        """
+        Tabela alias de descoberta para o peso e as categorias pedidas
+        Montada na primeira vez e reaproveitada até o modelo mudar de versão
+        """
+        tags = tuple(sorted({c.strip().lower() for c in categorias or [] if c.strip()}))
+        chave = (peso, tags)
+        with self._lock_alias:
+            if self._versao_tabelas_alias != self.versao_modelo:
+                self._tabelas_alias = {}
+                self._versao_tabelas_alias = self.versao_modelo
+            tabela = self._tabelas_alias.get(chave)
+            if tabela is None:
+                mascara = self._mascara_filtros({'tags': list(tags)}) if tags else None
+                tabela = criar_tabela(self.games_df, peso, mascara)
+                if len(self._tabelas_alias) >= DESCOBERTA_MAX_TABELAS:
+                    self._tabelas_alias.pop(next(iter(self._tabelas_alias)))
+                self._tabelas_alias[chave] = tabela
+            return tabela
+    
     def _atualizar_avaliacoes_jogo(self, jogo_id: int, positiva: bool) -> bool:
         """
         Atualiza as contagens de positive/negative no MySQL
@@ -226,6 +543,7 @@ class SistemaRecomendacaoGames:
             
             cursor.execute(query, (jogo_id,))
             connection.commit()
+            self.tendencias.registrar(jogo_id)
             
             logger.info(f"✅ Avaliação {'positiva' if positiva else 'negativa'} registrada para jogo {jogo_id}")
             return True
@@ -238,139 +556,313 @@ class SistemaRecomendacaoGames:
                 cursor.close()
                 connection.close()
     
+    def aplicar_alteracao_contadores(self, jogo_id: int, positive: int, negative: int) -> bool:
+        """
+        Atualiza em memória os contadores de um jogo (eventos do feed de alterações)
+        Mantém nota_media e total_avaliacoes, usadas pelos rankings, sem recarregar a base
+        
+        Returns:
+            True se o jogo existe no catálogo
+        """
+        posicao = self._posicoes_por_ids([jogo_id])[0]
+        if posicao < 0:
+            return False
+        
+        df = self.games_df
+        with self._lock_contadores:
+            df.iat[posicao, df.columns.get_loc('positive')] = positive
+            df.iat[posicao, df.columns.get_loc('negative')] = negative
+            df.iat[posicao, df.columns.get_loc('total_avaliacoes')] = positive + negative
+            df.iat[posicao, df.columns.get_loc('nota_media')] = self._calcular_nota_media(positive, negative)
+            self.versao_contadores += 1  # invalida as respostas em cache (ver api_game._versao_contadores)
+        return True
+    
     def _recarregar_e_retreinar(self):
         """
-        Recarrega dados do MySQL e retreina o modelo
+        Recarrega dados da fonte e retreina o modelo
         Chamado após atualizações nas avaliações
         """
         logger.info("🔄 Recarregando dados e retreinando modelo...")
-        self._carregar_dados_mysql()
-        self._preparar_modelo()
+        with etapa('carregar_dados'):
+            self._carregar_dados()
+        with etapa('preparar_modelo'):
+            self._preparar_modelo()
+        with self._lock_contadores:
+            self.versao_contadores += 1
         logger.info("✅ Sistema atualizado com sucesso!")
     
-    def _formatar_jogo(self, jogo_series) -> Dict[str, Any]:
-        """Formata os dados de um jogo para resposta da API"""
-        positive = self._converter_para_int(jogo_series.get('positive', 0))
-        negative = self._converter_para_int(jogo_series.get('negative', 0))
-        total_avaliacoes = positive + negative
-        
-        return {
-            'id': self._converter_para_int(jogo_series.get('id', 0)),
-            'name': jogo_series.get('name', ''),
-            'release_date': str(jogo_series.get('release_date', '')),
-            'required_age': self._converter_para_int(jogo_series.get('required_age', 0)),
-            'price': float(jogo_series.get('price', 0)),
-            'header_image': jogo_series.get('header_image', ''),
-            'positive': positive,
-            'negative': negative,
-            'recommendations': self._converter_para_int(jogo_series.get('recommendations', 0)),
-            'genres': jogo_series.get('genres', ''),
-            'categories': jogo_series.get('categories', ''),
-            'description': jogo_series.get('description', ''),
-            'nota_media': self._calcular_nota_media(positive, negative),
-            'total_avaliacoes': total_avaliacoes
-        }
+    def _formatar_jogo(self, jogo_series, campos: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Formata os dados de um jogo para resposta da API
+        
+        Args:
+            jogo_series: Linha do DataFrame com o jogo
+            campos: Subconjunto de CAMPOS_JOGO a devolver (None = todos)
+        """
+        with etapa('formatacao'):
+            positive = self._converter_para_int(jogo_series.get('positive', 0))
+            negative = self._converter_para_int(jogo_series.get('negative', 0))
+            total_avaliacoes = positive + negative
+            
+            # Campos pesados só são lidos quando pedidos
+            def frio(campo):
+                if campos and campo not in campos:
+                    return None
+                return self._campo_frio(jogo_series, campo)
+            
+            jogo = {
+                'id': self._converter_para_int(jogo_series.get('id', 0)),
+                'name': jogo_series.get('name', ''),
+                'release_date': str(jogo_series.get('release_date', '')),
+                'required_age': self._converter_para_int(jogo_series.get('required_age', 0)),
+                'price': round(float(jogo_series.get('price', 0)), 2),
+                'header_image': frio('header_image'),
+                'positive': positive,
+                'negative': negative,
+                'recommendations': self._converter_para_int(jogo_series.get('recommendations', 0)),
+                'genres': jogo_series.get('genres', ''),
+                'categories': jogo_series.get('categories', ''),
+                'description': frio('description'),
+                'nota_media': self._calcular_nota_media(positive, negative),
+                'total_avaliacoes': total_avaliacoes
+            }
+            
+            if campos:
+                return {campo: jogo[campo] for campo in campos if campo in jogo}
+            return jogo
+    
+    def _formatar_posicoes(self, posicoes, campos: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Formata os jogos das posições do catálogo, na ordem recebida
+        (None para jogos que não existem mais na fonte; ver SistemaRecomendacaoPushdown)
+        """
+        return [self._formatar_jogo(self.games_df.iloc[idx], campos) for idx in posicoes]
     
     # =========================================================================
     # FUNÇÕES PRINCIPAIS - API
     # =========================================================================
     
-    def get_todos_jogos(self, limite: int = None) -> List[Dict[str, Any]]:
+    def get_todos_jogos(self, limite: int = None, campos: Optional[List[str]] = None,
+                        inicio: int = 0, apos: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Retorna todos os jogos da base
         
         Args:
             limite: Número máximo de jogos a retornar
+            campos: Campos a incluir em cada jogo (None = todos)
+            inicio: Posição do primeiro jogo (usado na paginação)
+            apos: Paginação por chave: jogos com id maior que este (ignora `inicio`)
             
         Returns:
             Lista de dicionários com informações dos jogos
         """
         df = self.games_df
+        if apos is not None:
+            df = df[df['id'] > apos].sort_values('id')
+        elif inicio:
+            df = df.iloc[inicio:]
         if limite:
             df = df.head(limite)
         
-        return [self._formatar_jogo(jogo) for _, jogo in df.iterrows()]
+        return [self._formatar_jogo(jogo, campos) for _, jogo in df.iterrows()]
     
-    def get_jogo_por_id(self, jogo_id: int) -> Optional[Dict[str, Any]]:
+    def get_jogo_por_id(self, jogo_id: int, campos: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """
         Retorna um jogo específico pelo ID
         
         Args:
             jogo_id: ID do jogo
+            campos: Campos a incluir (None = todos)
             
         Returns:
             Dicionário com informações do jogo ou None se não encontrado
         """
         jogo = self.games_df[self.games_df['id'] == jogo_id]
         if not jogo.empty:
-            return self._formatar_jogo(jogo.iloc[0])
+            return self._formatar_jogo(jogo.iloc[0], campos)
         return None
     
-    def get_jogo_por_nome(self, nome: str) -> List[Dict[str, Any]]:
+    def get_jogo_por_nome(self, nome: str, campos: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Busca jogos por nome (busca parcial)
         
         Args:
             nome: Nome ou parte do nome do jogo
+            campos: Campos a incluir em cada jogo (None = todos)
             
         Returns:
             Lista de jogos que correspondem à busca
         """
-        jogos_encontrados = self.games_df[
-            self.games_df['name'].str.contains(nome, case=False, na=False)
-        ]
-        return [self._formatar_jogo(jogo) for _, jogo in jogos_encontrados.iterrows()]
+        with etapa('filtros'):
+            jogos_encontrados = self.games_df[
+                self.games_df['name'].str.contains(nome, case=False, na=False, regex=False)
+            ]
+        return [self._formatar_jogo(jogo, campos) for _, jogo in jogos_encontrados.iterrows()]
     
-    def get_jogos_recomendados(self, jogo_id: int, limite: int = 5) -> List[Dict[str, Any]]:
+    def get_jogos_recomendados(self, jogo_id: int, limite: int = 5,
+                               campos: Optional[List[str]] = None,
+                               filtros: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Retorna jogos recomendados baseados em similaridade de conteúdo
         
         Args:
             jogo_id: ID do jogo base para recomendação
             limite: Número de recomendações a retornar
+            campos: Campos a incluir em cada jogo (None = todos)
+            filtros: Restrições sobre os recomendados (ver _mascara_filtros):
+                preco_max, idade_max, tags, excluir_tags, lancamento_de, lancamento_ate
             
         Returns:
             Lista de jogos recomendados
         """
-        # Encontrar índice do jogo
-        indice_jogo = self.games_df[self.games_df['id'] == jogo_id].index
+        posicoes = self._posicoes_por_ids([jogo_id])
         
-        if len(indice_jogo) == 0:
+        if posicoes[0] < 0:
             return []
         
-        idx = indice_jogo[0]
+        # Top N por similaridade (excluindo o próprio jogo)
+        jogos_indices = self._recomendar_posicoes(posicoes, limite, self._mascara_filtros(filtros))[0]
         
-        # Obter scores de similaridade para este jogo
-        sim_scores = list(enumerate(self.similarity_matrix[idx]))
+        # Retornar informações dos jogos
+        return [jogo for jogo in self._formatar_posicoes(jogos_indices, campos) if jogo is not None]
+    
+    def get_jogos_por_ids(self, ids: List[int],
+                          campos: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Retorna vários jogos de uma vez pelos IDs
         
-        # Ordenar por similaridade (descrescente) e pegar top N+1 (excluindo o próprio jogo)
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)[1:limite+1]
+        Args:
+            ids: Lista de IDs de jogos
+            campos: Campos a incluir em cada jogo (None = todos)
+            
+        Returns:
+            Lista alinhada com `ids`: o jogo formatado ou None se não encontrado
+        """
+        if not ids:
+            return []
+        posicoes = self._posicoes_por_ids(ids)
+        formatados = iter(self._formatar_posicoes(posicoes[posicoes >= 0], campos))
+        return [next(formatados) if idx >= 0 else None for idx in posicoes]
+    
+    def get_jogos_recomendados_lote(self, ids: List[int], limite: int = 5,
+                                    campos: Optional[List[str]] = None,
+                                    filtros: Optional[Dict[str, Any]] = None) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Retorna recomendações para vários jogos base em uma única passada
         
-        # Buscar índices dos jogos recomendados
-        jogos_indices = [i[0] for i in sim_scores]
+        Args:
+            ids: IDs dos jogos base
+            limite: Número de recomendações por jogo
+            campos: Campos a incluir em cada jogo (None = todos)
+            filtros: Mesmas restrições de get_jogos_recomendados
+            
+        Returns:
+            Dicionário {jogo_id: lista de recomendados}; IDs inexistentes ficam com lista vazia
+        """
+        resultado = {int(jogo_id): [] for jogo_id in ids}
+        if not resultado:
+            return resultado
         
-        # Retornar informações dos jogos
-        jogos_recomendados = []
-        for idx in jogos_indices:
-            jogos_recomendados.append(self._formatar_jogo(self.games_df.iloc[idx]))
+        ids_base = np.array(list(resultado), dtype=object)
+        posicoes = self._posicoes_por_ids(ids_base)
+        validos = posicoes >= 0
+        if not validos.any():
+            return resultado
+        
+        vizinhos = self._recomendar_posicoes(posicoes[validos], limite, self._mascara_filtros(filtros))
+        
+        # Cada jogo é formatado uma vez, mesmo que apareça em vários resultados
+        unicas = pd.unique(np.concatenate(vizinhos)) if vizinhos else np.empty(0, dtype=np.int64)
+        formatados = dict(zip(unicas, self._formatar_posicoes(unicas, campos)))
+        for jogo_id, linha in zip(ids_base[validos], vizinhos):
+            resultado[int(jogo_id)] = [formatados[idx] for idx in linha if formatados[idx] is not None]
+        
+        return resultado
+    
+    def get_jogos_recomendados_multiplos(self, ids: List[int], limite: int = 5,
+                                         campos: Optional[List[str]] = None,
+                                         filtros: Optional[Dict[str, Any]] = None,
+                                         pesos: Optional[List[float]] = None,
+                                         negativos: Optional[List[int]] = None,
+                                         pesos_negativos: Optional[List[float]] = None) -> List[Dict[str, Any]]:
+        """
+        Recomendações para um conjunto de jogos ("mais como estes")
+        
+        Args:
+            ids: IDs das sementes (jogos de que o usuário gostou)
+            limite: Número de recomendações
+            campos: Campos a incluir em cada jogo (None = todos)
+            filtros: Mesmas restrições de get_jogos_recomendados
+            pesos: Peso de cada semente, alinhado com `ids` (padrão: 1)
+            negativos: IDs de jogos a evitar; afastam os parecidos com eles
+            pesos_negativos: Peso de cada negativo, alinhado com `negativos` (padrão: 1)
+            
+        Returns:
+            Lista de jogos recomendados, sem nenhuma das sementes; IDs
+            inexistentes são ignorados
+        """
+        pesos = [1.0] * len(ids) if pesos is None else pesos
+        negativos = negativos or []
+        pesos_negativos = [1.0] * len(negativos) if pesos_negativos is None else pesos_negativos
+        
+        # IDs repetidos somam os pesos; negativos entram com peso negativo
+        sementes = {}
+        for jogo_id, peso in zip(ids, pesos):
+            sementes[int(jogo_id)] = sementes.get(int(jogo_id), 0.0) + float(peso)
+        for jogo_id, peso in zip(negativos, pesos_negativos):
+            sementes[int(jogo_id)] = sementes.get(int(jogo_id), 0.0) - float(peso)
+        if not sementes:
+            return []
+        
+        posicoes = self._posicoes_por_ids(list(sementes))
+        pesos_sementes = np.fromiter(sementes.values(), dtype=np.float64, count=len(sementes))
+        validas = posicoes >= 0
+        if not (pesos_sementes[validas] > 0).any():
+            return []
         
-        return jogos_recomendados
+        jogos_indices = self._recomendar_agregado(
+            posicoes[validas], pesos_sementes[validas], limite, self._mascara_filtros(filtros)
+        )
+        return [jogo for jogo in self._formatar_posicoes(jogos_indices, campos) if jogo is not None]
     
-    def get_jogo_aleatorio(self) -> Dict[str, Any]:
+    def get_jogo_aleatorio(self, campos: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         Retorna um jogo aleatório da base
         
+        Args:
+            campos: Campos a incluir (None = todos)
+        
         Returns:
             Dicionário com informações do jogo
         """
-        jogo_aleatorio = self.games_df.sample(1).iloc[0]
-        return self._formatar_jogo(jogo_aleatorio)
+        posicao = int(self._rng.integers(len(self.games_df)))
+        return self._formatar_posicoes([posicao], campos)[0]
+    
+    def get_jogos_descoberta(self, quantidade: int = 1, peso: str = PESO_POPULARIDADE,
+                             categorias: Optional[List[str]] = None,
+                             campos: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Sorteia jogos distintos para a descoberta ("me surpreenda")
+        
+        Args:
+            quantidade: Número de jogos distintos a sortear
+            peso: popularidade, avaliacao ou uniforme (ver descoberta.pesos_descoberta)
+            categorias: Tags que os jogos devem ter (categories/genres, todas obrigatórias)
+            campos: Campos a incluir em cada jogo (None = todos)
+            
+        Returns:
+            Lista de jogos sorteados (menos que `quantidade` se não houver jogos suficientes)
+        """
+        tabela = self._tabela_alias(peso, categorias)
+        posicoes = tabela.sortear_distintos(quantidade, self._rng)
+        return [jogo for jogo in self._formatar_posicoes(posicoes, campos) if jogo is not None]
     
         # =========================================================================
     # NOVA FUNÇÃO - RECOMENDAÇÃO POR CATEGORIAS
     # =========================================================================
     
-    def get_jogos_por_categorias(self, categorias: List[str], limite: int = 10) -> List[Dict[str, Any]]:
+    def get_jogos_por_categorias(self, categorias: List[str], limite: int = 10,
+                                 campos: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Retorna jogos que correspondem a 4 categorias informadas pelo usuário
         Ordena por nota média (melhores avaliados primeiro)
@@ -378,6 +870,7 @@ class SistemaRecomendacaoGames:
         Args:
             categorias: Lista de 4 categorias para filtrar
             limite: Número máximo de jogos a retornar
+            campos: Campos a incluir em cada jogo (None = todos)
             
         Returns:
             Lista de jogos que correspondem às categorias
@@ -386,18 +879,20 @@ class SistemaRecomendacaoGames:
             logger.warning(f"⚠️ Esperadas 4 categorias, recebidas {len(categorias)}")
         
         # Filtrar jogos que contêm TODAS as categorias
-        jogos_filtrados = self.games_df.copy()
-        
-        for categoria in categorias:
-            if categoria.strip():  # Ignorar categorias vazias
-                jogos_filtrados = jogos_filtrados[
-                    jogos_filtrados['categories'].str.contains(categoria, case=False, na=False)
-                ]
+        with etapa('filtros'):
+            jogos_filtrados = self.games_df.copy()
+            
+            for categoria in categorias:
+                if categoria.strip():  # Ignorar categorias vazias
+                    jogos_filtrados = jogos_filtrados[
+                        jogos_filtrados['categories'].str.contains(categoria.strip(), case=False, na=False, regex=False)
+                    ]
         
         # Ordenar por nota média (melhores primeiro) e pegar o limite
         if not jogos_filtrados.empty:
-            jogos_ordenados = jogos_filtrados.sort_values('nota_media', ascending=False).head(limite)
-            return [self._formatar_jogo(jogo) for _, jogo in jogos_ordenados.iterrows()]
+            with etapa('ordenacao'):
+                jogos_ordenados = jogos_filtrados.sort_values('nota_media', ascending=False).head(limite)
+            return [self._formatar_jogo(jogo, campos) for _, jogo in jogos_ordenados.iterrows()]
         else:
             return []
     
@@ -422,51 +917,68 @@ class SistemaRecomendacaoGames:
         
         return False
     
-    def get_ranking_populares(self, limite: int = 10) -> List[Dict[str, Any]]:
+    def get_ranking_populares(self, limite: int = 10, campos: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Retorna ranking dos jogos mais populares (mais avaliações)
         
         Args:
             limite: Número de jogos no ranking
+            campos: Campos a incluir em cada jogo (None = todos)
             
         Returns:
             Lista ordenada de jogos mais populares
         """
-        self.games_df['total_avaliacoes'] = self.games_df.apply(
-            lambda x: self._converter_para_int(x['positive']) + self._converter_para_int(x['negative']), 
-            axis=1
-        )
-        ranking = self.games_df.sort_values('total_avaliacoes', ascending=False).head(limite)
-        return [self._formatar_jogo(jogo) for _, jogo in ranking.iterrows()]
+        # total_avaliacoes é mantida por _preparar_modelo e aplicar_alteracao_contadores
+        with etapa('ordenacao'):
+            ranking = self.games_df.nlargest(limite, 'total_avaliacoes')
+        return [self._formatar_jogo(jogo, campos) for _, jogo in ranking.iterrows()]
     
-    def get_ranking_melhor_avaliados(self, limite: int = 10, min_avaliacoes: int = 5) -> List[Dict[str, Any]]:
+    def get_ranking_melhor_avaliados(self, limite: int = 10, min_avaliacoes: int = 5,
+                                     campos: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """
         Retorna ranking dos jogos melhor avaliados
         
         Args:
             limite: Número de jogos no ranking
             min_avaliacoes: Mínimo de avaliações para considerar
+            campos: Campos a incluir em cada jogo (None = todos)
             
         Returns:
             Lista ordenada de jogos melhor avaliados
         """
-        self.games_df['total_avaliacoes'] = self.games_df.apply(
-            lambda x: self._converter_para_int(x['positive']) + self._converter_para_int(x['negative']), 
-            axis=1
-        )
-        jogos_filtrados = self.games_df[self.games_df['total_avaliacoes'] >= min_avaliacoes]
+        # total_avaliacoes e nota_media são mantidas por _preparar_modelo e aplicar_alteracao_contadores
+        with etapa('filtros'):
+            jogos_filtrados = self.games_df[self.games_df['total_avaliacoes'] >= min_avaliacoes]
+        with etapa('ordenacao'):
+            ranking = jogos_filtrados.nlargest(limite, 'nota_media')
+        return [self._formatar_jogo(jogo, campos) for _, jogo in ranking.iterrows()]
+
+    def get_ranking_tendencias(self, limite: int = 10,
+                               campos: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Retorna os jogos com mais votos recentes (decaimento exponencial)
         
-        # Calcular nota média para filtro
-        jogos_filtrados['nota_media'] = jogos_filtrados.apply(
-            lambda x: self._calcular_nota_media(
-                self._converter_para_int(x['positive']), 
-                self._converter_para_int(x['negative'])
-            ), 
-            axis=1
-        )
+        Args:
+            limite: Número de jogos no ranking (até TENDENCIAS_TOP)
+            campos: Campos a incluir em cada jogo (None = todos)
+            
+        Returns:
+            Lista ordenada; cada jogo traz `tendencia` (votos recentes já decaídos)
+        """
+        with etapa('ordenacao'):
+            ranking = self.tendencias.ranking(limite)
+        if not ranking:
+            return []
         
-        ranking = jogos_filtrados.sort_values('nota_media', ascending=False).head(limite)
-        return [self._formatar_jogo(jogo) for _, jogo in ranking.iterrows()]
+        posicoes = self._posicoes_por_ids([jogo_id for jogo_id, _ in ranking])
+        encontrados = posicoes >= 0
+        votos = [votos for (_, votos), encontrado in zip(ranking, encontrados) if encontrado]
+        jogos = []
+        for jogo, votos_jogo in zip(self._formatar_posicoes(posicoes[encontrados], campos), votos):
+            if jogo is not None:
+                jogo['tendencia'] = round(votos_jogo, 3)
+                jogos.append(jogo)
+        return jogos
 
 # Exemplo de uso independente
 if __name__ == "__main__":
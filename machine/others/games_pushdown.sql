@@ -0,0 +1,96 @@
+-- ================================================
+-- Projeto: Modo pushdown da API (MODO_CONSULTA=pushdown)
+-- Descrição: Colunas de ranking, índices e tabelas de tags usados pelas
+-- consultas do pushdown_mysql.py (MySQL 8.0+)
+-- ================================================
+
+-- ================================================
+-- MÉTRICAS DE RANKING
+-- Calculadas pelo próprio MySQL, sempre atualizadas junto com positive/negative
+-- (mesmas fórmulas de _calcular_nota_media no knn_game.py)
+-- ================================================
+
+ALTER TABLE games
+    ADD COLUMN total_avaliacoes INT
+        GENERATED ALWAYS AS (COALESCE(positive, 0) + COALESCE(negative, 0)) STORED,
+    ADD COLUMN nota_media DECIMAL(3,2)
+        GENERATED ALWAYS AS (
+            IF(COALESCE(positive, 0) + COALESCE(negative, 0) = 0,
+               3.00,
+               ROUND(1 + 4 * COALESCE(positive, 0) / (COALESCE(positive, 0) + COALESCE(negative, 0)), 2))
+        ) STORED;
+
+-- ================================================
+-- ÍNDICES
+-- ================================================
+
+-- Busca por nome (prefixo de palavras)
+ALTER TABLE games ADD FULLTEXT INDEX ft_games_name (name);
+
+-- Rankings: a ordenação e o filtro por mínimo de avaliações são resolvidos
+-- só no índice; as linhas completas são lidas apenas para o top N
+CREATE INDEX idx_games_populares ON games (total_avaliacoes DESC, id);
+CREATE INDEX idx_games_melhores ON games (nota_media DESC, id, total_avaliacoes);
+
+-- ================================================
+-- TAGS NORMALIZADAS (categories / genres)
+-- ================================================
+
+CREATE TABLE IF NOT EXISTS tags (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    nome VARCHAR(100) NOT NULL,
+    UNIQUE KEY uk_tags_nome (nome)
+);
+
+CREATE TABLE IF NOT EXISTS game_tags (
+    tag_id INT NOT NULL,
+    game_id INT NOT NULL,
+    origem ENUM('category', 'genre') NOT NULL,
+    PRIMARY KEY (tag_id, origem, game_id),
+    KEY idx_game_tags_game (game_id),
+    CONSTRAINT fk_game_tags_tag FOREIGN KEY (tag_id) REFERENCES tags(id),
+    CONSTRAINT fk_game_tags_game FOREIGN KEY (game_id) REFERENCES games(id) ON DELETE CASCADE
+);
+
+-- ================================================
+-- CARGA DAS TAGS
+-- As listas separadas por vírgula viram arrays JSON e são expandidas com
+-- JSON_TABLE. Pode ser executada de novo após importar jogos (INSERT IGNORE).
+-- ================================================
+
+INSERT IGNORE INTO tags (nome)
+SELECT DISTINCT LOWER(TRIM(t.tag))
+FROM games g
+JOIN JSON_TABLE(
+    CONCAT('["', REPLACE(REPLACE(REPLACE(g.categories, '\\', ''), '"', ''), ',', '","'), '"]'),
+    '$[*]' COLUMNS (tag VARCHAR(100) PATH '$')
+) t
+WHERE g.categories IS NOT NULL AND TRIM(t.tag) <> ''
+UNION
+SELECT DISTINCT LOWER(TRIM(t.tag))
+FROM games g
+JOIN JSON_TABLE(
+    CONCAT('["', REPLACE(REPLACE(REPLACE(g.genres, '\\', ''), '"', ''), ',', '","'), '"]'),
+    '$[*]' COLUMNS (tag VARCHAR(100) PATH '$')
+) t
+WHERE g.genres IS NOT NULL AND TRIM(t.tag) <> '';
+
+INSERT IGNORE INTO game_tags (tag_id, game_id, origem)
+SELECT tg.id, g.id, 'category'
+FROM games g
+JOIN JSON_TABLE(
+    CONCAT('["', REPLACE(REPLACE(REPLACE(g.categories, '\\', ''), '"', ''), ',', '","'), '"]'),
+    '$[*]' COLUMNS (tag VARCHAR(100) PATH '$')
+) t
+JOIN tags tg ON tg.nome = LOWER(TRIM(t.tag))
+WHERE g.categories IS NOT NULL;
+
+INSERT IGNORE INTO game_tags (tag_id, game_id, origem)
+SELECT tg.id, g.id, 'genre'
+FROM games g
+JOIN JSON_TABLE(
+    CONCAT('["', REPLACE(REPLACE(REPLACE(g.genres, '\\', ''), '"', ''), ',', '","'), '"]'),
+    '$[*]' COLUMNS (tag VARCHAR(100) PATH '$')
+) t
+JOIN tags tg ON tg.nome = LOWER(TRIM(t.tag))
+WHERE g.genres IS NOT NULL;
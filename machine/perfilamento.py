@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Perfilamento de requisições da API
+
+- Etapas: blocos `with etapa("formatacao"):` no SistemaRecomendacaoGames e na
+  serialização acumulam o tempo de cada fase da requisição atual (via
+  contextvar; fora de uma requisição não custam nada além de uma leitura).
+- Server-Timing: a resposta traz a duração de cada etapa
+  (visível na aba Network do navegador).
+- Log de requisições lentas: acima de API_LENTO_MS, uma amostra
+  (API_LENTO_AMOSTRA) é registrada com o detalhamento por etapa.
+- cProfile sob demanda: com API_PERFIL_TOKEN definido, uma requisição com o
+  header `X-Perfil: <token>` (ou `?perfil=<token>`) é perfilada por inteiro. O
+  resultado é salvo em API_PERFIL_DIR (.prof para pstats/snakeviz e .txt com
+  o resumo) e o id volta no header `X-Perfil-Id`.
+"""
+
+import hmac
+import logging
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+API_PERFIL_TOKEN = os.getenv("API_PERFIL_TOKEN", "")
+API_PERFIL_DIR = os.getenv("API_PERFIL_DIR", os.path.join(tempfile.gettempdir(), "gamelist-perfis"))
+API_PERFIL_TOP = int(os.getenv("API_PERFIL_TOP", 30))
+API_LENTO_MS = float(os.getenv("API_LENTO_MS", 500))
+API_LENTO_AMOSTRA = float(os.getenv("API_LENTO_AMOSTRA", 0.1))
+API_SERVER_TIMING = os.getenv("API_SERVER_TIMING", "false").lower() == "true"
+
+PADRAO_ID_PERFIL = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$")
+
+_perfil_atual: ContextVar[Optional["PerfilRequisicao"]] = ContextVar("perfil_requisicao", default=None)
+
+# cProfile não aceita dois perfis ativos ao mesmo tempo no Python 3.12+
+_lock_profiler = threading.Lock()
+
+
+# ================================================================
+# ETAPAS
+# ================================================================
+
+class _EtapaNula:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_ETAPA_NULA = _EtapaNula()
+
+
+class _Etapa:
+    __slots__ = ("perfil", "nome", "inicio")
+
+    def __init__(self, perfil: "PerfilRequisicao", nome: str):
+        self.perfil = perfil
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.perfil.registrar(self.nome, time.perf_counter() - self.inicio)
+        return False
+
+
+def etapa(nome: str):
+    """Context manager que soma a duração do bloco na etapa `nome` da requisição atual"""
+    perfil = _perfil_atual.get()
+    if perfil is None:
+        return _ETAPA_NULA
+    return _Etapa(perfil, nome)
+
+
+class PerfilRequisicao:
+    """Tempos por etapa (e, se pedido, o cProfile) de uma requisição"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.total = None
+        self.etapas: Dict[str, float] = {}
+        self.chamadas: Dict[str, int] = {}
+        self.profiler = None
+        self.perfil_id = None
+
+    def registrar(self, nome: str, segundos: float):
+        self.etapas[nome] = self.etapas.get(nome, 0.0) + segundos
+        self.chamadas[nome] = self.chamadas.get(nome, 0) + 1
+
+    def iniciar_profiler(self) -> bool:
+        """Liga o cProfile; False se outra requisição já está sendo perfilada"""
+        if not _lock_profiler.acquire(blocking=False):
+            return False
+        import cProfile
+        self.profiler = cProfile.Profile()
+        try:
+            self.profiler.enable()
+        except ValueError:
+            # Outra ferramenta de perfilamento ativa no processo
+            self.profiler = None
+            _lock_profiler.release()
+            return False
+        return True
+
+    def parar_profiler(self):
+        """Desliga o cProfile (idempotente) e libera o lock"""
+        if self.profiler is None:
+            return None
+        profiler, self.profiler = self.profiler, None
+        profiler.disable()
+        _lock_profiler.release()
+        return profiler
+
+    def encerrar(self):
+        if self.total is None:
+            self.total = time.perf_counter() - self.inicio
+
+    def detalhamento(self) -> str:
+        """Ex.: 'formatacao=12.3ms(50x), serializacao=1.2ms'"""
+        partes = []
+        for nome, segundos in sorted(self.etapas.items(), key=lambda e: e[1], reverse=True):
+            chamadas = self.chamadas[nome]
+            partes.append(f"{nome}={segundos * 1000:.1f}ms" + (f"({chamadas}x)" if chamadas > 1 else ""))
+        return ", ".join(partes)
+
+    def server_timing(self) -> str:
+        partes = [
+            f'{nome};dur={segundos * 1000:.2f};desc="{self.chamadas[nome]}x"'
+            for nome, segundos in self.etapas.items()
+        ]
+        partes.append(f"total;dur={self.total * 1000:.2f}")
+        return ", ".join(partes)
+
+
+# ================================================================
+# CPROFILE SOB DEMANDA
+# ================================================================
+
+def perfilamento_autorizado(token: Optional[str]) -> bool:
+    """O token enviado confere com API_PERFIL_TOKEN (desativado se a variável estiver vazia)"""
+    if not API_PERFIL_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), API_PERFIL_TOKEN.encode("utf-8"))
+
+
+def salvar_perfil(profiler, descricao: str, perfil: PerfilRequisicao) -> str:
+    """
+    Grava <id>.prof (pstats) e <id>.txt (resumo) em API_PERFIL_DIR
+
+    Returns:
+        Id do perfil
+    """
+    import io
+    import pstats
+
+    os.makedirs(API_PERFIL_DIR, exist_ok=True)
+    perfil_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    base = os.path.join(API_PERFIL_DIR, perfil_id)
+    profiler.dump_stats(f"{base}.prof")
+
+    resumo = io.StringIO()
+    resumo.write(f"{descricao}\n")
+    resumo.write(f"total: {perfil.total * 1000:.1f}ms\n")
+    resumo.write(f"etapas: {perfil.detalhamento() or '-'}\n\n")
+    pstats.Stats(profiler, stream=resumo).sort_stats("cumulative").print_stats(API_PERFIL_TOP)
+    with open(f"{base}.txt", "w", encoding="utf-8") as arquivo:
+        arquivo.write(resumo.getvalue())
+
+    logger.info(f"🔬 Perfil salvo: {base}.prof ({descricao})")
+    return perfil_id
+
+
+def ler_resumo_perfil(perfil_id: str) -> Optional[str]:
+    """Resumo em texto de um perfil salvo, ou None se o id não existir"""
+    if not PADRAO_ID_PERFIL.match(perfil_id):
+        return None
+    try:
+        with open(os.path.join(API_PERFIL_DIR, f"{perfil_id}.txt"), encoding="utf-8") as arquivo:
+            return arquivo.read()
+    except OSError:
+        return None
+
+
+# ================================================================
+# INTEGRAÇÃO COM O FLASK
+# ================================================================
+
+def _descrever_requisicao(request) -> str:
+    """Método, caminho e query string, sem o token de perfilamento"""
+    from urllib.parse import urlencode
+
+    query = urlencode([(chave, valor) for chave, valor in request.args.items(multi=True) if chave != "perfil"])
+    return f"{request.method} {request.path}" + (f"?{query}" if query else "")
+
+
+def instalar_perfilamento(app):
+    """Registra os hooks que medem cada requisição do app Flask"""
+    from flask import g, request
+
+    @app.before_request
+    def _iniciar_perfil():
+        perfil = PerfilRequisicao()
+        g.perfil_requisicao = perfil
+        g.perfil_token = _perfil_atual.set(perfil)
+        token = request.headers.get("X-Perfil") or request.args.get("perfil")
+        if token:
+            g.perfil_pedido = perfilamento_autorizado(token)
+            if g.perfil_pedido and not perfil.iniciar_profiler():
+                g.perfil_pedido = "ocupado"
+
+    @app.after_request
+    def _finalizar_perfil(response):
+        perfil = g.get("perfil_requisicao")
+        if perfil is None:
+            return response
+        profiler = perfil.parar_profiler()
+        perfil.encerrar()
+        descricao = _descrever_requisicao(request)
+
+        if profiler is not None:
+            try:
+                perfil.perfil_id = salvar_perfil(profiler, descricao, perfil)
+                response.headers["X-Perfil-Id"] = perfil.perfil_id
+            except OSError as e:
+                logger.error(f"❌ Não foi possível salvar o perfil: {e}")
+        elif g.get("perfil_pedido") == "ocupado":
+            response.headers["X-Perfil"] = "ocupado"
+
+        if API_SERVER_TIMING:
+            response.headers["Server-Timing"] = perfil.server_timing()
+
+        if perfil.total * 1000 >= API_LENTO_MS and random.random() < API_LENTO_AMOSTRA:
+            logger.warning(
+                f"🐢 Requisição lenta: {descricao} {perfil.total * 1000:.1f}ms "
+                f"[{perfil.detalhamento() or 'sem etapas'}]"
+            )
+        return response
+
+    @app.teardown_request
+    def _limpar_perfil(exc):
+        perfil = g.pop("perfil_requisicao", None)
+        if perfil is not None:
+            # Requisição que terminou em exceção não passa pelo after_request
+            perfil.parar_profiler()
+        token = g.pop("perfil_token", None)
+        if token is not None:
+            try:
+                _perfil_atual.reset(token)
+            except ValueError:
+                pass  # teardown em outro contexto; o contexto da requisição é descartado
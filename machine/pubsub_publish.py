@@ -1,25 +1,87 @@
-from google.cloud import pubsub_v1
+import os
 import json
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# IDs corretos
-project_id = "boreal-conquest-477422-p5"
-topic_id = "games"
+# Tópico: GCP_PUBSUB_TOPIC_NAME (caminho completo projects/<proj>/topics/<topic>)
+# ou GCP_PUBSUB_PROJECT_ID + GCP_PUBSUB_TOPIC_ID. Sem projeto, a publicação
+# fica desativada: não há projeto padrão para onde mandar as avaliações
+project_id = os.getenv("GCP_PUBSUB_PROJECT_ID", "")
+topic_id = os.getenv("GCP_PUBSUB_TOPIC_ID", "games")
+topic_name = os.getenv("GCP_PUBSUB_TOPIC_NAME", "")
+publicacao_ativa = topic_name.startswith("projects/") or bool(project_id)
 
-publisher = pubsub_v1.PublisherClient()
-topic_path = publisher.topic_path(project_id, topic_id)
+if not publicacao_ativa:
+    print("⚠️ GCP_PUBSUB_PROJECT_ID não definido: publicação de avaliações desativada")
 
-def publish_evaluation(user_id, game_id, evaluation):
-    """
-    Publica uma avaliação (positiva ou negativa) no Pub/Sub.
 
-    Args:
-        user_id (int): ID do usuário.
-        game_id (int): ID do jogo.
-        evaluation (str): 'positive' ou 'negative'.
+class PublicacaoDesativadaError(RuntimeError):
+    """Projeto do Pub/Sub não configurado"""
+
+# O cliente só é criado na primeira publicação: importar o SDK do Pub/Sub
+# e abrir o canal gRPC não deve pesar na importação da API
+_publisher = None
+_topic_path = None
+_lock = threading.Lock()
+
+# Falha ao criar o cliente (ex.: sem credenciais): novas tentativas só depois
+# de um intervalo que dobra a cada falha, em vez de pagar o custo a cada avaliação
+PUBSUB_BACKOFF_INICIAL = float(os.getenv("PUBSUB_BACKOFF_INICIAL", 5))
+PUBSUB_BACKOFF_MAX = float(os.getenv("PUBSUB_BACKOFF_MAX", 300))
+_ultimo_erro = None
+_proxima_tentativa = 0.0
+_backoff = PUBSUB_BACKOFF_INICIAL
+
+def publisher_pronto():
+    """True se o cliente já existe (publicar não bloqueia criando o cliente)"""
+    return _publisher is not None
+
+def _obter_publisher():
+    """
+    Retorna (publisher, topic_path), criando o cliente na primeira chamada
+    Durante o backoff após uma falha, levanta de novo o último erro sem tentar
     """
+    global _publisher, _topic_path, _ultimo_erro, _proxima_tentativa, _backoff
+    if not publicacao_ativa:
+        raise PublicacaoDesativadaError(
+            "Publicação desativada: defina GCP_PUBSUB_PROJECT_ID ou GCP_PUBSUB_TOPIC_NAME=projects/<proj>/topics/<topic>"
+        )
+    if _publisher is None:
+        with _lock:
+            if _publisher is None:
+                if _ultimo_erro is not None and time.monotonic() < _proxima_tentativa:
+                    raise _ultimo_erro
+                try:
+                    from google.cloud import pubsub_v1
+                    publisher = pubsub_v1.PublisherClient()
+                except Exception as e:
+                    _ultimo_erro = e
+                    _proxima_tentativa = time.monotonic() + _backoff
+                    print(f"Erro ao criar o cliente Pub/Sub (nova tentativa em {_backoff:.0f}s): {e}")
+                    _backoff = min(_backoff * 2, PUBSUB_BACKOFF_MAX)
+                    raise
+                if topic_name.startswith("projects/"):
+                    _topic_path = topic_name
+                else:
+                    _topic_path = publisher.topic_path(project_id, topic_name or topic_id)
+                _publisher = publisher
+                _ultimo_erro = None
+                _backoff = PUBSUB_BACKOFF_INICIAL
+    return _publisher, _topic_path
+
+def iniciar_publisher():
+    """Cria o cliente antecipadamente (ex.: no startup do ASGI); False se falhar"""
+    try:
+        _obter_publisher()
+        return True
+    except Exception:
+        return False
+
+def _montar_mensagem(user_id, game_id, evaluation):
+    """Valida e codifica a mensagem de avaliação em JSON (bytes)"""
     if evaluation not in ("positive", "negative"):
         raise ValueError("evaluation deve ser 'positive' ou 'negative'")
 
@@ -29,9 +91,33 @@ def publish_evaluation(user_id, game_id, evaluation):
         "evaluation": evaluation
     }
 
-    data = json.dumps(message_dict).encode("utf-8")
+    return json.dumps(message_dict).encode("utf-8")
+
+def publish_evaluation_future(user_id, game_id, evaluation):
+    """
+    Publica uma avaliação sem bloquear a thread chamadora.
+
+    Returns:
+        Future do Pub/Sub (subclasse de concurrent.futures.Future) que
+        resolve para o message_id. Pode ser aguardado com asyncio.wrap_future.
+    """
+    data = _montar_mensagem(user_id, game_id, evaluation)
+    publisher, topic_path = _obter_publisher()
+    return publisher.publish(topic_path, data)
+
+def publish_evaluation(user_id, game_id, evaluation):
+    """
+    Publica uma avaliação (positiva ou negativa) no Pub/Sub.
+
+    Args:
+        user_id (int): ID do usuário.
+        game_id (int): ID do jogo.
+        evaluation (str): 'positive' ou 'negative'.
+    """
+    data = _montar_mensagem(user_id, game_id, evaluation)
 
     try:
+        publisher, topic_path = _obter_publisher()
         future = publisher.publish(topic_path, data)
         message_id = future.result()
         print(f"Mensagem publicada com ID: {message_id}")
@@ -1,10 +1,15 @@
 import os
 import json
+import queue
+import threading
+import time
 import warnings
+from collections import OrderedDict
 import mysql.connector
 from concurrent.futures import TimeoutError
 from dotenv import load_dotenv
 from google.cloud import pubsub_v1
+from feed_alteracoes import criar_publicador, criar_evento
 
 # Suprimir FutureWarnings do PubSub
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -34,51 +39,162 @@ DB_CONFIG = {
     "autocommit": False
 }
 
+# Cache de deduplicação (ver CacheTTL)
+CACHE_MAX_ITENS = int(os.getenv("WORKER_CACHE_MAX_ITENS", 100000))
+CACHE_TTL = float(os.getenv("WORKER_CACHE_TTL", 300))  # segundos
+ESTATISTICAS_A_CADA = int(os.getenv("WORKER_ESTATISTICAS_A_CADA", 500))  # mensagens
+
+# Execução: "callback" (uma transação por mensagem, nas threads do subscriber)
+# ou "faixas" (mensagens roteadas por game_id para faixas fixas, ver FaixaJogo)
+MODO = os.getenv("WORKER_MODO", "callback")
+NUM_FAIXAS = int(os.getenv("WORKER_FAIXAS", 4))
+CAPACIDADE_FAIXA = int(os.getenv("WORKER_FAIXA_CAPACIDADE", 100))  # flow control: faixas x capacidade
+LOTE_MAX = int(os.getenv("WORKER_LOTE_MAX", 50))
+
+class CacheTTL:
+    """
+    Cache limitado (remove o item mais antigo quando cheio) com expiração
+    por tempo e contadores de acertos/erros. Seguro entre threads.
+    """
+    def __init__(self, max_itens: int, ttl: float):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None or item[1] < agora:
+                if item is not None:
+                    del self._itens[chave]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return item[0]
+
+    def set(self, chave, valor):
+        expira = time.monotonic() + self.ttl
+        with self._lock:
+            self._itens[chave] = (valor, expira)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def estatisticas(self):
+        with self._lock:
+            return {"itens": len(self._itens), "hits": self.hits, "misses": self.misses}
+
+# message_id -> True: redeliveries de mensagens já confirmadas no MySQL
+mensagens_processadas = CacheTTL(CACHE_MAX_ITENS, CACHE_TTL)
+# (user_id, game_id) -> última avaliação gravada: votos repetidos não vão ao MySQL.
+# Com várias instâncias do worker um voto pode mudar em outra instância; o TTL
+# limita por quanto tempo este valor pode ficar desatualizado.
+avaliacoes_conhecidas = CacheTTL(CACHE_MAX_ITENS, CACHE_TTL)
+_contador_mensagens = 0
+_contador_lock = threading.Lock()
+
+def estatisticas_cache():
+    """Acertos/erros dos caches de deduplicação"""
+    return {
+        "mensagens_processadas": mensagens_processadas.estatisticas(),
+        "avaliacoes_conhecidas": avaliacoes_conhecidas.estatisticas()
+    }
+
+def _registrar_mensagem():
+    """Imprime as estatísticas dos caches a cada ESTATISTICAS_A_CADA mensagens"""
+    global _contador_mensagens
+    with _contador_lock:
+        _contador_mensagens += 1
+        imprimir = ESTATISTICAS_A_CADA > 0 and _contador_mensagens % ESTATISTICAS_A_CADA == 0
+    if imprimir:
+        print(f"[CACHE] {json.dumps(estatisticas_cache())}")
+
+# Feed de alterações para as instâncias da API (ver feed_alteracoes.py)
+publicador_feed = criar_publicador()
+
+def _publicar_feed(eventos):
+    """Envia os eventos já confirmados no MySQL; falhas não afetam a mensagem"""
+    if not eventos:
+        return
+    try:
+        publicador_feed.publicar(eventos)
+    except Exception as e:
+        print(f"[FEED] falha ao publicar {len(eventos)} eventos: {e}")
+
 def conectar_mysql():
     return mysql.connector.connect(**DB_CONFIG)
 
-def upsert_evaluation_and_update_counts(conn, user_id: int, game_id: int, new_eval: str):
-    cursor = conn.cursor()
+def _upsert_rating(cursor, user_id: int, game_id: int, new_eval: str):
+    """
+    Insere/atualiza a avaliação em game_ratings (sem commit e sem tocar em games)
+
+    Returns:
+        (resultado, delta_positive, delta_negative)
+    """
     if new_eval not in ("positive", "negative"):
         raise ValueError("evaluation deve ser 'positive' ou 'negative'")
-    col_map = {"positive": "positive", "negative": "negative"}
-    new_col = col_map[new_eval]
-    old_col = col_map["negative" if new_eval == "positive" else "positive"]
     cursor.execute(
         "SELECT evaluation FROM game_ratings WHERE user_id = %s AND game_id = %s FOR UPDATE",
         (user_id, game_id)
     )
     row = cursor.fetchone()
+    sinal = 1 if new_eval == "positive" else -1
     if row is None:
         cursor.execute(
             "INSERT INTO game_ratings (user_id, game_id, evaluation) VALUES (%s, %s, %s)",
             (user_id, game_id, new_eval)
         )
-        cursor.execute(
-            f"UPDATE games SET `{new_col}` = COALESCE(`{new_col}`,0) + 1 WHERE id = %s",
-            (game_id,)
-        )
-        conn.commit()
-        cursor.close()
-        return "inserted"
+        return "inserted", max(sinal, 0), max(-sinal, 0)
     existing_eval = row[0]
     if existing_eval == new_eval:
-        conn.commit()
-        cursor.close()
-        return "no_change"
+        return "no_change", 0, 0
     cursor.execute(
         "UPDATE game_ratings SET evaluation = %s WHERE user_id = %s AND game_id = %s",
         (new_eval, user_id, game_id)
     )
+    return "updated", sinal, -sinal
+
+def _aplicar_deltas(cursor, game_id: int, delta_pos: int, delta_neg: int):
+    """Aplica a variação dos contadores de games em um único UPDATE"""
+    if delta_pos == 0 and delta_neg == 0:
+        return
+    cursor.execute(
+        "UPDATE games SET "
+        "`positive` = GREATEST(COALESCE(`positive`,0) + %s, 0), "
+        "`negative` = GREATEST(COALESCE(`negative`,0) + %s, 0) "
+        "WHERE id = %s",
+        (delta_pos, delta_neg, game_id)
+    )
+
+def _evento_feed(cursor, game_id: int, delta_pos: int, delta_neg: int):
+    """Lê os contadores atualizados (dentro da transação) e monta o evento do feed"""
+    if delta_pos == 0 and delta_neg == 0:
+        return None
     cursor.execute(
-        f"UPDATE games SET `{old_col}` = GREATEST(COALESCE(`{old_col}`,0) - 1, 0), `{new_col}` = COALESCE(`{new_col}`,0) + 1 WHERE id = %s",
+        "SELECT COALESCE(`positive`,0), COALESCE(`negative`,0) FROM games WHERE id = %s",
         (game_id,)
     )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return criar_evento(game_id, row[0], row[1], delta_pos, delta_neg)
+
+def upsert_evaluation_and_update_counts(conn, user_id: int, game_id: int, new_eval: str):
+    cursor = conn.cursor()
+    result, delta_pos, delta_neg = _upsert_rating(cursor, user_id, game_id, new_eval)
+    _aplicar_deltas(cursor, game_id, delta_pos, delta_neg)
+    evento = _evento_feed(cursor, game_id, delta_pos, delta_neg)
     conn.commit()
     cursor.close()
-    return "updated"
+    _publicar_feed([evento] if evento else [])
+    return result
 
-def process_message_json(payload_json: str):
+def _interpretar_payload(payload_json: str):
+    """Valida o JSON da mensagem e retorna (user_id, game_id, evaluation)"""
     try:
         data = json.loads(payload_json)
         user_id = int(data.get("user_id"))
@@ -89,11 +205,20 @@ def process_message_json(payload_json: str):
     except Exception as e:
         print(f"[ERROR] payload inválido: {e} -- payload: {payload_json}")
         raise
+    return user_id, game_id, evaluation
+
+def process_message_json(payload_json: str):
+    user_id, game_id, evaluation = _interpretar_payload(payload_json)
+    if avaliacoes_conhecidas.get((user_id, game_id)) == evaluation:
+        print(f"[OK] cache: user={user_id}, game={game_id}, eval={evaluation} -> no_change")
+        return "no_change"
     conn = None
     try:
         conn = conectar_mysql()
         result = upsert_evaluation_and_update_counts(conn, user_id, game_id, evaluation)
+        avaliacoes_conhecidas.set((user_id, game_id), evaluation)
         print(f"[OK] processado: user={user_id}, game={game_id}, eval={evaluation} -> {result}")
+        return result
     finally:
         if conn:
             conn.close()
@@ -101,18 +226,203 @@ def process_message_json(payload_json: str):
 def callback(message: pubsub_v1.subscriber.message.Message) -> None:
     payload = message.data.decode("utf-8")
     print(f"[RECEBIDO] {payload}")
+    _registrar_mensagem()
+    if mensagens_processadas.get(message.message_id):
+        print(f"[DUPLICADA] {message.message_id} já processada, ack sem acessar o MySQL")
+        message.ack()
+        return
     try:
         process_message_json(payload)
+        mensagens_processadas.set(message.message_id, True)
         message.ack()
     except Exception as e:
         print(f"[ERRO] ao processar mensagem: {e}")
         message.nack()
 
+# ================================================================
+# MODO FAIXAS: SHARDING POR game_id
+# ================================================================
+
+class FaixaJogo(threading.Thread):
+    """
+    Faixa de execução: uma thread, uma fila e uma conexão MySQL.
+    Todas as mensagens de um jogo caem sempre na mesma faixa, então um jogo
+    é processado em série (sem disputar o lock da linha em games) enquanto
+    jogos de faixas diferentes andam em paralelo. Mensagens enfileiradas são
+    processadas em lote: uma transação, e um único UPDATE em games por jogo
+    com a soma das variações dos contadores.
+    """
+    def __init__(self, numero: int, lote_max: int):
+        super().__init__(name=f"faixa-{numero}", daemon=True)
+        self.numero = numero
+        self.lote_max = lote_max
+        # Sem limite próprio: o flow control do subscriber já limita o total em trânsito.
+        # Uma fila limitada faria um jogo muito avaliado travar os callbacks de todas as faixas
+        self.fila = queue.Queue()
+        self._conn = None
+
+    def enfileirar(self, message, dados):
+        self.fila.put((message, dados))
+
+    def encerrar(self):
+        self.fila.put(None)
+
+    def _conexao(self):
+        if self._conn is None or not self._conn.is_connected():
+            self._conn = conectar_mysql()
+        return self._conn
+
+    def run(self):
+        ativo = True
+        while ativo:
+            item = self.fila.get()
+            if item is None:
+                break
+            lote = [item]
+            while len(lote) < self.lote_max:
+                try:
+                    item = self.fila.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    ativo = False
+                    break
+                lote.append(item)
+            self._processar_lote(lote)
+        if self._conn is not None:
+            self._conn.close()
+
+    def _processar_lote(self, lote):
+        pendentes = []
+        # Último voto de cada (user_id, game_id) já visto neste lote: o cache só
+        # reflete o estado anterior ao lote e não serve para mensagens posteriores
+        # do mesmo par (ex.: cache positivo e lote [negative, positive])
+        ultimos = {}
+        for message, dados in lote:
+            user_id, game_id, evaluation = dados
+            chave = (user_id, game_id)
+            if mensagens_processadas.get(message.message_id):
+                print(f"[DUPLICADA] {message.message_id} já processada, ack sem acessar o MySQL")
+                message.ack()
+                continue
+            if chave in ultimos:
+                # Mesmo que repita o voto anterior do lote, segue na transação:
+                # o ack fica junto com o da mensagem que ela repete
+                pendentes.append((message, dados))
+            elif avaliacoes_conhecidas.get(chave) == evaluation:
+                print(f"[OK] cache: user={user_id}, game={game_id}, eval={evaluation} -> no_change")
+                mensagens_processadas.set(message.message_id, True)
+                message.ack()
+            else:
+                pendentes.append((message, dados))
+            ultimos[chave] = evaluation
+        if not pendentes:
+            return
+
+        try:
+            jogos = self._gravar(pendentes)
+        except Exception as e:
+            print(f"[ERRO] faixa {self.numero}: lote de {len(pendentes)} mensagens falhou: {e}")
+            if len(pendentes) == 1:
+                pendentes[0][0].nack()
+                return
+            # Uma mensagem ruim (ex.: game_id inexistente) não derruba o lote:
+            # cada uma é refeita na sua própria transação e só as que falharem de novo voltam
+            falhas = 0
+            for item in pendentes:
+                try:
+                    self._gravar([item])
+                except Exception as e:
+                    print(f"[ERRO] faixa {self.numero}: mensagem {item[0].message_id} falhou: {e}")
+                    item[0].nack()
+                    falhas += 1
+            print(f"[OK] faixa {self.numero}: lote refeito uma a uma, {len(pendentes) - falhas} ok, {falhas} devolvidas")
+            return
+        print(f"[OK] faixa {self.numero}: {len(pendentes)} mensagens, {jogos} jogos atualizados")
+
+    def _gravar(self, pendentes):
+        """
+        Grava as mensagens em uma transação, publica o feed e dá ack
+        Em caso de erro desfaz a transação e levanta a exceção (sem ack/nack).
+
+        Returns:
+            Quantidade de jogos atualizados
+        """
+        deltas = {}
+        eventos = []
+        conn = None
+        try:
+            conn = self._conexao()
+            cursor = conn.cursor()
+            for message, (user_id, game_id, evaluation) in pendentes:
+                _, delta_pos, delta_neg = _upsert_rating(cursor, user_id, game_id, evaluation)
+                pos, neg = deltas.get(game_id, (0, 0))
+                deltas[game_id] = (pos + delta_pos, neg + delta_neg)
+            for game_id, (delta_pos, delta_neg) in deltas.items():
+                _aplicar_deltas(cursor, game_id, delta_pos, delta_neg)
+                evento = _evento_feed(cursor, game_id, delta_pos, delta_neg)
+                if evento:
+                    eventos.append(evento)
+            conn.commit()
+            cursor.close()
+        except Exception:
+            try:
+                if conn is not None:
+                    conn.rollback()
+            except Exception:
+                self._conn = None
+            raise
+
+        _publicar_feed(eventos)
+        for message, (user_id, game_id, evaluation) in pendentes:
+            avaliacoes_conhecidas.set((user_id, game_id), evaluation)
+            mensagens_processadas.set(message.message_id, True)
+            message.ack()
+        return len(deltas)
+
+faixas = []
+
+def iniciar_faixas(num_faixas: int = NUM_FAIXAS, lote_max: int = LOTE_MAX):
+    """Cria e inicia as faixas de execução"""
+    faixas.clear()
+    for numero in range(num_faixas):
+        faixa = FaixaJogo(numero, lote_max)
+        faixa.start()
+        faixas.append(faixa)
+    return faixas
+
+def encerrar_faixas():
+    for faixa in faixas:
+        faixa.encerrar()
+    for faixa in faixas:
+        faixa.join()
+
+def callback_faixas(message: pubsub_v1.subscriber.message.Message) -> None:
+    """Valida a mensagem e a encaminha para a faixa do seu game_id"""
+    payload = message.data.decode("utf-8")
+    print(f"[RECEBIDO] {payload}")
+    _registrar_mensagem()
+    try:
+        dados = _interpretar_payload(payload)
+    except Exception:
+        message.nack()
+        return
+    faixas[dados[1] % len(faixas)].enfileirar(message, dados)
+
 if __name__ == "__main__":
     subscriber = pubsub_v1.SubscriberClient()
     subscription_path = subscriber.subscription_path(PROJECT_ID, SUBSCRIPTION_ID)
-    streaming_pull_future = subscriber.subscribe(subscription_path, callback=callback)
-    print(f"🚀 Worker Pub/Sub iniciado. Ouvindo mensagens em: {subscription_path}\n")
+    if MODO == "faixas":
+        iniciar_faixas()
+        # Único limite de mensagens em trânsito (somadas todas as faixas)
+        flow_control = pubsub_v1.types.FlowControl(max_messages=NUM_FAIXAS * CAPACIDADE_FAIXA)
+        streaming_pull_future = subscriber.subscribe(
+            subscription_path, callback=callback_faixas, flow_control=flow_control
+        )
+        print(f"🚀 Worker Pub/Sub iniciado ({NUM_FAIXAS} faixas por game_id). Ouvindo mensagens em: {subscription_path}\n")
+    else:
+        streaming_pull_future = subscriber.subscribe(subscription_path, callback=callback)
+        print(f"🚀 Worker Pub/Sub iniciado. Ouvindo mensagens em: {subscription_path}\n")
     with subscriber:
         try:
             if TIMEOUT > 0:
@@ -125,4 +435,8 @@ if __name__ == "__main__":
         except KeyboardInterrupt:
             print("Interrompido pelo usuário.")
             streaming_pull_future.cancel()
-            streaming_pull_future.result()
\ No newline at end of file
+            streaming_pull_future.result()
+        finally:
+            if faixas:
+                encerrar_faixas()
+            print(f"[CACHE] {json.dumps(estatisticas_cache())}")
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Testes do modo faixas do pubsub_worker, sem MySQL nem Pub/Sub
+(conexão falsa em memória). Execução: python pubsub_worker_test.py ou pytest
+"""
+import os
+
+os.environ.setdefault("GCP_PUBSUB_PROJECT_ID", "teste")
+os.environ.setdefault("GCP_PUBSUB_SUB_NAME", "teste-sub")
+os.environ.setdefault("FEED_BACKEND", "nenhum")
+
+import pubsub_worker as worker
+
+
+class CursorFalso:
+    """Entende só as consultas usadas por _upsert_rating/_aplicar_deltas/_evento_feed"""
+
+    def __init__(self, banco):
+        self.banco = banco
+        self._linha = None
+
+    def execute(self, sql, args=()):
+        sql = " ".join(sql.split())
+        if sql.startswith("SELECT evaluation FROM game_ratings"):
+            valor = self.banco["ratings"].get((args[0], args[1]))
+            self._linha = (valor,) if valor else None
+        elif sql.startswith("INSERT INTO game_ratings"):
+            self.banco["ratings"][(args[0], args[1])] = args[2]
+        elif sql.startswith("UPDATE game_ratings"):
+            self.banco["ratings"][(args[1], args[2])] = args[0]
+        elif sql.startswith("UPDATE games"):
+            pos, neg = self.banco["games"].get(args[2], (0, 0))
+            self.banco["games"][args[2]] = (max(pos + args[0], 0), max(neg + args[1], 0))
+        elif sql.startswith("SELECT COALESCE"):
+            self._linha = self.banco["games"].get(args[0])
+
+    def fetchone(self):
+        return self._linha
+
+    def close(self):
+        pass
+
+
+class ConexaoFalsa:
+    def __init__(self, banco):
+        self.banco = banco
+
+    def cursor(self):
+        return CursorFalso(self.banco)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+
+class MensagemFalsa:
+    def __init__(self, message_id):
+        self.message_id = message_id
+        self.resultado = None
+
+    def ack(self):
+        self.resultado = "ack"
+
+    def nack(self):
+        self.resultado = "nack"
+
+
+def test_lote_com_voto_trocado_e_desfeito_grava_o_ultimo():
+    """Cache positivo e lote [negative, positive]: o voto final é positive"""
+    banco = {"ratings": {(1, 7): "positive"}, "games": {7: (1, 0)}}
+    worker.avaliacoes_conhecidas.set((1, 7), "positive")
+    faixa = worker.FaixaJogo(0, lote_max=50)
+    faixa._conn = ConexaoFalsa(banco)
+
+    mensagens = [MensagemFalsa("aba-1"), MensagemFalsa("aba-2")]
+    faixa._processar_lote([
+        (mensagens[0], (1, 7, "negative")),
+        (mensagens[1], (1, 7, "positive")),
+    ])
+
+    assert [m.resultado for m in mensagens] == ["ack", "ack"]
+    assert banco["ratings"][(1, 7)] == "positive"
+    assert banco["games"][7] == (1, 0)
+    assert worker.avaliacoes_conhecidas.get((1, 7)) == "positive"
+
+
+def test_lote_a_b_a_sem_cache():
+    """Sem cache: positive -> negative -> positive no mesmo lote termina em positive"""
+    banco = {"ratings": {}, "games": {8: (0, 0)}}
+    faixa = worker.FaixaJogo(0, lote_max=50)
+    faixa._conn = ConexaoFalsa(banco)
+
+    faixa._processar_lote([
+        (MensagemFalsa("sem-cache-1"), (2, 8, "positive")),
+        (MensagemFalsa("sem-cache-2"), (2, 8, "negative")),
+        (MensagemFalsa("sem-cache-3"), (2, 8, "positive")),
+    ])
+
+    assert banco["ratings"][(2, 8)] == "positive"
+    assert banco["games"][8] == (1, 0)
+
+
+if __name__ == "__main__":
+    test_lote_com_voto_trocado_e_desfeito_grava_o_ultimo()
+    test_lote_a_b_a_sem_cache()
+    print("✅ Testes do modo faixas OK")
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Modo pushdown (MODO_CONSULTA=pushdown)
+Para catálogos maiores que a memória de cada processo da API: as consultas
+de catálogo viram SQL indexado no MySQL e só os dados do modelo de vizinhos
+(tags, filtros de recomendação e contadores) ficam em memória.
+
+- busca por nome: índice FULLTEXT (prefixo de palavras);
+- categorias: tabelas normalizadas tags/game_tags;
+- rankings: índices de cobertura + busca das linhas só para o top N;
+- paginação: por chave (id > apos), sem OFFSET.
+
+Requer o schema de others/games_pushdown.sql.
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+import mysql.connector
+import numpy as np
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
+
+from fontes_dados import COLUNAS_JOGO, FonteMySQL
+from knn_game import SistemaRecomendacaoGames
+from perfilamento import etapa
+
+logger = logging.getLogger(__name__)
+
+# Colunas mantidas em memória: conteúdo do modelo, filtros de recomendação e contadores
+COLUNAS_VIZINHOS = (
+    'id', 'release_date', 'required_age', 'price', 'positive', 'negative', 'genres', 'categories'
+)
+
+# Colunas da tabela games lidas para cada campo da resposta (ver CAMPOS_JOGO)
+COLUNAS_POR_CAMPO = {coluna: (coluna,) for coluna in COLUNAS_JOGO}
+COLUNAS_POR_CAMPO['nota_media'] = ('positive', 'negative')
+COLUNAS_POR_CAMPO['total_avaliacoes'] = ('positive', 'negative')
+
+PUSHDOWN_POOL = int(os.getenv('PUSHDOWN_POOL', 8))
+PUSHDOWN_BUSCA_MAX = int(os.getenv('PUSHDOWN_BUSCA_MAX', 200))
+
+# innodb_ft_min_token_size padrão: palavras menores não entram no índice FULLTEXT
+TAMANHO_MIN_PALAVRA_FULLTEXT = 3
+
+
+def _colunas_select(campos: Optional[List[str]], alias: str = '') -> str:
+    """Lista de colunas do SELECT com só o necessário para os campos pedidos"""
+    necessarias = {'id'}
+    for campo in campos or COLUNAS_POR_CAMPO:
+        necessarias.update(COLUNAS_POR_CAMPO.get(campo, ()))
+    prefixo = f'{alias}.' if alias else ''
+    return ', '.join(f'{prefixo}{coluna}' for coluna in COLUNAS_JOGO if coluna in necessarias)
+
+
+def _escapar_like(texto: str) -> str:
+    return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class SistemaRecomendacaoPushdown(SistemaRecomendacaoGames):
+    """
+    Mesma interface do SistemaRecomendacaoGames; o games_df guarda só
+    COLUNAS_VIZINHOS e os jogos devolvidos pela API são lidos do MySQL.
+    """
+
+    def __init__(self, fonte=None):
+        self._pool = None
+        self._lock_pool = threading.Lock()
+        super().__init__(fonte if fonte is not None else FonteMySQL(self._conectar_mysql))
+
+    # =========================================================================
+    # CONEXÃO E CONSULTAS
+    # =========================================================================
+
+    def _conectar_mysql(self):
+        """Conexão do pool (close() a devolve); se o pool estiver esgotado, abre uma avulsa"""
+        try:
+            if self._pool is None:
+                with self._lock_pool:
+                    if self._pool is None:
+                        self._pool = pooling.MySQLConnectionPool(
+                            pool_name='pushdown', pool_size=PUSHDOWN_POOL,
+                            connection_timeout=3, **self.db_config
+                        )
+            try:
+                return self._pool.get_connection()
+            except PoolError:
+                return mysql.connector.connect(**self.db_config, connection_timeout=3)
+        except Error as e:
+            logger.error(f"❌ Erro ao conectar ao MySQL: {e}")
+            return None
+
+    def _consultar(self, sql: str, parametros=()) -> List[Dict[str, Any]]:
+        """Executa um SELECT e devolve as linhas como dicionários"""
+        connection = self._conectar_mysql()
+        if not connection:
+            raise RuntimeError("MySQL indisponível para consulta no modo pushdown")
+        try:
+            with etapa('sql'):
+                cursor = connection.cursor(dictionary=True)
+                cursor.execute(sql, tuple(parametros))
+                linhas = cursor.fetchall()
+                cursor.close()
+            return linhas
+        finally:
+            connection.close()
+
+    def _carregar_dados(self):
+        """Carrega só as colunas do modelo de vizinhos; o restante fica no MySQL"""
+        df = self.fonte.carregar(COLUNAS_VIZINHOS)
+        if df is None:
+            # Dados simulados não batem com as consultas feitas no MySQL
+            raise RuntimeError("MySQL indisponível: o modo pushdown não usa dados simulados")
+        self.games_df = df
+
+    def _campo_frio(self, jogo_series, campo: str):
+        return jogo_series.get(campo, '')
+
+    def _buscar_por_ids(self, ids, campos: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        """Jogos formatados, alinhados com `ids` (None se o id não existe)"""
+        ids = [int(jogo_id) for jogo_id in ids]
+        if not ids:
+            return []
+        # IDs fora do intervalo de BIGINT não existem (e o MySQL recusaria o parâmetro)
+        limites = np.iinfo(np.int64)
+        consultados = [jogo_id for jogo_id in ids if limites.min <= jogo_id <= limites.max]
+        if not consultados:
+            return [None] * len(ids)
+        marcadores = ', '.join(['%s'] * len(consultados))
+        linhas = self._consultar(
+            f"SELECT {_colunas_select(campos)} FROM games WHERE id IN ({marcadores})", consultados
+        )
+        por_id = {linha['id']: linha for linha in linhas}
+        return [self._formatar_jogo(por_id[jogo_id], campos) if jogo_id in por_id else None for jogo_id in ids]
+
+    def _formatar_posicoes(self, posicoes, campos: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        ids = self.games_df['id'].to_numpy()[np.asarray(posicoes, dtype=np.int64)]
+        return self._buscar_por_ids(ids, campos)
+
+    def _formatar_linhas(self, linhas, campos: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return [self._formatar_jogo(linha, campos) for linha in linhas]
+
+    # =========================================================================
+    # FUNÇÕES PRINCIPAIS - API (traduzidas para SQL)
+    # =========================================================================
+
+    def get_todos_jogos(self, limite: int = None, campos: Optional[List[str]] = None,
+                        inicio: int = 0, apos: Optional[int] = None) -> List[Dict[str, Any]]:
+        sql = f"SELECT {_colunas_select(campos)} FROM games"
+        parametros = []
+        if apos is not None:
+            # Paginação por chave: o índice primário vai direto ao primeiro id da página
+            sql += " WHERE id > %s"
+            parametros.append(int(apos))
+        sql += " ORDER BY id"
+        if limite:
+            sql += " LIMIT %s"
+            parametros.append(int(limite))
+        if inicio and apos is None:
+            if not limite:
+                sql += " LIMIT 18446744073709551615"
+            sql += " OFFSET %s"
+            parametros.append(int(inicio))
+        return self._formatar_linhas(self._consultar(sql, parametros), campos)
+
+    def get_jogo_por_id(self, jogo_id: int, campos: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        return self._buscar_por_ids([jogo_id], campos)[0]
+
+    def get_jogos_por_ids(self, ids: List[int],
+                          campos: Optional[List[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        return self._buscar_por_ids(ids, campos)
+
+    def get_jogo_por_nome(self, nome: str, campos: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Busca por prefixo de palavras no índice FULLTEXT ("bowl" encontra "Bowling").
+        Termos com palavras curtas demais para o índice usam LIKE.
+
+        Difere do modo em memória (substring em qualquer posição, sem limite):
+        "owl" não encontra "Bowling", e a resposta traz no máximo
+        PUSHDOWN_BUSCA_MAX jogos, os de menor id.
+        """
+        palavras = re.findall(r'\w+', nome)
+        if palavras and all(len(palavra) >= TAMANHO_MIN_PALAVRA_FULLTEXT for palavra in palavras):
+            condicao = "MATCH(name) AGAINST (%s IN BOOLEAN MODE)"
+            parametro = ' '.join(f'+{palavra}*' for palavra in palavras)
+        else:
+            condicao = "name LIKE %s"
+            parametro = f"%{_escapar_like(nome)}%"
+        linhas = self._consultar(
+            f"SELECT {_colunas_select(campos)} FROM games WHERE {condicao} ORDER BY id LIMIT %s",
+            (parametro, PUSHDOWN_BUSCA_MAX)
+        )
+        return self._formatar_linhas(linhas, campos)
+
+    def get_jogos_por_categorias(self, categorias: List[str], limite: int = 10,
+                                 campos: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Jogos com TODAS as categorias, melhores notas primeiro
+        Como no modo em memória, cada categoria é buscada como parte do nome
+        de uma tag, sem diferenciar maiúsculas ("multi" encontra "Multi-player").
+        """
+        if len(categorias) != 4:
+            logger.warning(f"⚠️ Esperadas 4 categorias, recebidas {len(categorias)}")
+
+        tags = sorted({categoria.strip().lower() for categoria in categorias if categoria.strip()})
+        if not tags:
+            return self._ranking("nota_media", limite, campos)
+
+        # A tabela tags é pequena: o LIKE percorre poucas linhas e o resto usa os índices de game_tags
+        padroes = [f"%{_escapar_like(tag)}%" for tag in tags]
+        qualquer = ' OR '.join(['t.nome LIKE %s'] * len(tags))
+        todas = ' AND '.join(['SUM(t.nome LIKE %s) > 0'] * len(tags))
+        sql = f"""
+            SELECT {_colunas_select(campos, 'g')}
+            FROM games g
+            JOIN (
+                SELECT gt.game_id
+                FROM tags t
+                JOIN game_tags gt ON gt.tag_id = t.id AND gt.origem = 'category'
+                WHERE {qualquer}
+                GROUP BY gt.game_id
+                HAVING {todas}
+            ) m ON m.game_id = g.id
+            ORDER BY g.nota_media DESC, g.id
+            LIMIT %s
+        """
+        linhas = self._consultar(sql, [*padroes, *padroes, int(limite)])
+        return self._formatar_linhas(linhas, campos)
+
+    def _ranking(self, coluna: str, limite: int, campos: Optional[List[str]] = None,
+                 min_avaliacoes: int = 0) -> List[Dict[str, Any]]:
+        """
+        Top N por uma coluna de ranking. A subconsulta é resolvida só no índice
+        de cobertura (idx_games_populares / idx_games_melhores); as linhas
+        completas são lidas apenas para os N escolhidos.
+        """
+        sql = f"""
+            SELECT {_colunas_select(campos, 'g')}
+            FROM games g
+            JOIN (
+                SELECT id FROM games
+                WHERE total_avaliacoes >= %s
+                ORDER BY {coluna} DESC, id
+                LIMIT %s
+            ) r ON r.id = g.id
+            ORDER BY g.{coluna} DESC, g.id
+        """
+        linhas = self._consultar(sql, (int(min_avaliacoes), int(limite)))
+        return self._formatar_linhas(linhas, campos)
+
+    def get_ranking_populares(self, limite: int = 10, campos: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return self._ranking("total_avaliacoes", limite, campos)
+
+    def get_ranking_melhor_avaliados(self, limite: int = 10, min_avaliacoes: int = 5,
+                                     campos: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return self._ranking("nota_media", limite, campos, min_avaliacoes)
+
+    def post_avaliacao_jogo(self, jogo_id: int, positiva: bool) -> bool:
+        """
+        Registra a avaliação direto no MySQL. As consultas já leem os contadores
+        atualizados e o modelo de vizinhos não depende deles: não há retreino.
+        """
+        return self._atualizar_avaliacoes_jogo(jogo_id, positiva)
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+Serialização JSON e compressão das respostas da API
+Usa orjson quando instalado e negocia gzip/brotli acima de um tamanho mínimo
+"""
+
+import gzip
+import json
+import os
+from typing import Any, List, Optional
+
+from flask import Response, request
+
+from perfilamento import etapa
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Respostas menores que isso não compensam o custo de comprimir
+COMPRESSAO_MIN_BYTES = int(os.getenv("API_COMPRESSAO_MIN_BYTES", 1024))
+NIVEL_GZIP = int(os.getenv("API_COMPRESSAO_NIVEL_GZIP", 6))
+NIVEL_BROTLI = int(os.getenv("API_COMPRESSAO_NIVEL_BROTLI", 5))
+
+
+def _valor_padrao(valor):
+    """Converte tipos que o JSON não conhece (numpy, Decimal, datas)"""
+    if hasattr(valor, 'item'):
+        return valor.item()
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return str(valor)
+
+
+def serializar(dados: Any) -> bytes:
+    """
+    Serializa um objeto para JSON em bytes (UTF-8)
+
+    Args:
+        dados: Objeto a serializar. Se já for bytes, é devolvido sem alteração
+
+    Returns:
+        Corpo JSON codificado
+    """
+    if isinstance(dados, (bytes, bytearray, memoryview)):
+        return bytes(dados)
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                dados,
+                default=_valor_padrao,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            )
+        except TypeError:
+            pass  # ex.: inteiro fora de 64 bits ecoado da requisição; o json padrão aceita
+    return json.dumps(
+        dados, ensure_ascii=False, separators=(',', ':'), default=_valor_padrao
+    ).encode('utf-8')
+
+
+def _escolher_codificacao() -> Optional[str]:
+    """Escolhe a compressão aceita pelo cliente (brotli tem preferência)"""
+    aceitas = request.accept_encodings
+    if brotli is not None and aceitas.quality('br') > 0:
+        return 'br'
+    if aceitas.quality('gzip') > 0:
+        return 'gzip'
+    return None
+
+
+def resposta_json(dados: Any, status: int = 200) -> Response:
+    """
+    Monta uma resposta JSON com compressão negociada
+
+    Args:
+        dados: Objeto a serializar ou corpo JSON já codificado (bytes)
+        status: Código HTTP da resposta
+
+    Returns:
+        Response do Flask
+    """
+    with etapa('serializacao'):
+        corpo = serializar(dados)
+    headers = {'Vary': 'Accept-Encoding'}
+
+    if len(corpo) >= COMPRESSAO_MIN_BYTES:
+        codificacao = _escolher_codificacao()
+        if codificacao is not None:
+            with etapa('compressao'):
+                if codificacao == 'br':
+                    corpo = brotli.compress(corpo, quality=NIVEL_BROTLI)
+                else:
+                    corpo = gzip.compress(corpo, compresslevel=NIVEL_GZIP)
+            headers['Content-Encoding'] = codificacao
+
+    return Response(corpo, status=status, headers=headers, mimetype='application/json')
+
+
+def interpretar_campos(valor: Optional[str]) -> Optional[List[str]]:
+    """
+    Interpreta o parâmetro `campos` (ex.: "id,name,nota_media")
+
+    Returns:
+        Lista de campos na ordem informada ou None para todos os campos
+    """
+    if not valor:
+        return None
+    campos = [campo.strip() for campo in valor.split(',') if campo.strip()]
+    return campos or None
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Ranking de tendências (/ranking/tendencias)
+Cada jogo tem um contador de votos com decaimento exponencial: um voto vale 1
+agora e metade depois de TENDENCIAS_MEIA_VIDA_HORAS. Alimentado pelos eventos
+do feed (variações de positive/negative) e reconstruído na inicialização a
+partir de game_ratings com uma única consulta agregada.
+
+O contador é guardado em escala: cada voto soma exp(taxa * (t - base)), e o
+valor atual é pontos * exp(-taxa * (agora - base)). Como o fator é o mesmo
+para todos os jogos, a ordem não muda com o passar do tempo e nenhum contador
+precisa ser decaído; os pontos só crescem, o que permite manter o top N exato
+em um heap mínimo atualizado em O(log N) por evento.
+"""
+
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TENDENCIAS_MEIA_VIDA_HORAS = float(os.getenv('TENDENCIAS_MEIA_VIDA_HORAS', 12))
+TENDENCIAS_TOP = int(os.getenv('TENDENCIAS_TOP', 100))
+
+# Votos mais antigos que isto (em meias-vidas) pesam menos de 0,1%: não são lidos na reconstrução
+MEIAS_VIDAS_RECONSTRUCAO = 10
+# Expoente da escala a partir do qual os pontos são trazidos para uma base nova
+EXPOENTE_MAX = 50.0
+# Contadores abaixo disto (em votos atuais) são descartados ao trocar de base
+PONTOS_MINIMOS = 1e-3
+
+
+def votos_do_evento(evento: Dict[str, object]) -> int:
+    """
+    Votos novos ou alterados de um evento do feed
+
+    Um voto novo soma 1 em uma das variações; um voto trocado soma 1 em uma e
+    tira 1 da outra. Quando o worker agrega um lote, trocas e votos novos do
+    mesmo jogo se compensam e a contagem é aproximada.
+    """
+    return max(0, int(evento.get('delta_positive', 0))) + max(0, int(evento.get('delta_negative', 0)))
+
+
+class ContadorTendencias:
+    """
+    Contadores com decaimento exponencial e top N mantido em heap
+
+    Args:
+        meia_vida_horas: Tempo para um voto passar a valer metade
+        top: Tamanho máximo do ranking
+        relogio: Função que retorna o tempo atual em segundos (time.time)
+    """
+
+    def __init__(self, meia_vida_horas: float = TENDENCIAS_MEIA_VIDA_HORAS, top: int = TENDENCIAS_TOP,
+                 relogio: Callable[[], float] = time.time):
+        self.meia_vida_horas = meia_vida_horas
+        self.taxa = math.log(2) / (meia_vida_horas * 3600)
+        self.top = top
+        self._relogio = relogio
+        self._base = relogio()
+        self._pontos: Dict[int, float] = {}
+        self._membros = set()
+        # Entradas (pontos, jogo_id); as desatualizadas são descartadas quando chegam ao topo
+        self._heap: List[Tuple[float, int]] = []
+        self._ordenado: Optional[List[int]] = None
+        self._lock = threading.Lock()
+        self.eventos = 0
+
+    def __len__(self) -> int:
+        return len(self._pontos)
+
+    def registrar(self, jogo_id: int, votos: float = 1.0, ts: Optional[float] = None):
+        """Soma `votos` ao jogo no instante `ts` (padrão: agora)"""
+        if votos <= 0:
+            return
+        jogo_id = int(jogo_id)
+        with self._lock:
+            agora = self._relogio()
+            ts = agora if ts is None else min(ts, agora)
+            expoente = self.taxa * (ts - self._base)
+            if expoente > EXPOENTE_MAX:
+                self._trocar_base(ts)
+                expoente = 0.0
+            pontos = self._pontos.get(jogo_id, 0.0) + votos * math.exp(expoente)
+            self._pontos[jogo_id] = pontos
+            self._atualizar_top(jogo_id, pontos)
+            self.eventos += 1
+
+    def _atualizar_top(self, jogo_id: int, pontos: float):
+        if jogo_id in self._membros or len(self._membros) < self.top:
+            self._membros.add(jogo_id)
+        else:
+            self._descartar_desatualizadas()
+            if pontos <= self._heap[0][0]:
+                return
+            _, saiu = heapq.heappop(self._heap)
+            self._membros.discard(saiu)
+            self._membros.add(jogo_id)
+        heapq.heappush(self._heap, (pontos, jogo_id))
+        self._ordenado = None
+        if len(self._heap) > 4 * self.top + 16:
+            self._reconstruir_heap()
+
+    def _descartar_desatualizadas(self):
+        while self._heap:
+            pontos, jogo_id = self._heap[0]
+            if jogo_id in self._membros and self._pontos[jogo_id] == pontos:
+                return
+            heapq.heappop(self._heap)
+
+    def _reconstruir_heap(self):
+        self._heap = [(self._pontos[jogo_id], jogo_id) for jogo_id in self._membros]
+        heapq.heapify(self._heap)
+
+    def _trocar_base(self, base: float):
+        """Reescala os pontos para a nova base e descarta os contadores já desprezíveis"""
+        fator = math.exp(-self.taxa * (base - self._base))
+        self._pontos = {
+            jogo_id: pontos * fator for jogo_id, pontos in self._pontos.items()
+            if pontos * fator >= PONTOS_MINIMOS or jogo_id in self._membros
+        }
+        self._base = base
+        self._reconstruir_heap()
+
+    def reconstruir(self, votos_atuais: Dict[int, float]):
+        """Substitui todos os contadores pelos valores atuais (ex.: lidos de game_ratings)"""
+        with self._lock:
+            self._base = self._relogio()
+            self._pontos = {int(jogo_id): float(v) for jogo_id, v in votos_atuais.items() if v > 0}
+            self._membros = set(heapq.nlargest(self.top, self._pontos, key=self._pontos.get))
+            self._reconstruir_heap()
+            self._ordenado = None
+
+    def ranking(self, limite: int = 10) -> List[Tuple[int, float]]:
+        """
+        Top `limite` (até `top`) como (jogo_id, votos atuais), do maior para o menor
+
+        Custa O(limite): a ordenação dos membros só é refeita depois de uma mudança no top.
+        """
+        with self._lock:
+            if self._ordenado is None:
+                self._ordenado = sorted(self._membros, key=lambda jogo_id: (-self._pontos[jogo_id], jogo_id))
+            fator = math.exp(-self.taxa * (self._relogio() - self._base))
+            return [(jogo_id, self._pontos[jogo_id] * fator) for jogo_id in self._ordenado[:max(0, limite)]]
+
+
+def votos_recentes_mysql(conectar: Callable[[], object],
+                         meia_vida_horas: float = TENDENCIAS_MEIA_VIDA_HORAS) -> Optional[Dict[int, float]]:
+    """
+    Votos atuais (já decaídos) de cada jogo, calculados pelo MySQL em uma
+    consulta agregada sobre game_ratings. A idade de cada voto é medida pelo
+    relógio do banco, o mesmo que gravou created_at/updated_at.
+
+    Returns:
+        {game_id: votos} ou None se o MySQL não estiver disponível
+    """
+    from mysql.connector import Error
+
+    connection = conectar()
+    if not connection:
+        return None
+
+    segundos_meia_vida = meia_vida_horas * 3600
+    try:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            SELECT game_id,
+                   SUM(EXP(-TIMESTAMPDIFF(SECOND, COALESCE(updated_at, created_at), NOW()) / %s))
+            FROM game_ratings
+            WHERE COALESCE(updated_at, created_at) >= NOW() - INTERVAL %s SECOND
+            GROUP BY game_id
+            """,
+            (segundos_meia_vida / math.log(2), int(segundos_meia_vida * MEIAS_VIDAS_RECONSTRUCAO))
+        )
+        votos = {int(game_id): float(total) for game_id, total in cursor.fetchall()}
+        cursor.close()
+        return votos
+    except Error as e:
+        logger.error(f"❌ Erro ao reconstruir tendências: {e}")
+        return None
+    finally:
+        connection.close()